@@ -0,0 +1,80 @@
+"""Serverseitiges Filtern und Sortieren der Grid-Zeilen (Filter-/Sortiermodell des AGGrids)."""
+from operator import itemgetter
+from typing import Any, Dict, List
+
+
+def _matches_text(value: Any, condition: Dict) -> bool:
+    """Textfilter wie der agTextColumnFilter (ohne Groß-/Kleinschreibung)."""
+    kind = condition.get('type', 'contains')
+    text = '' if value is None else str(value).lower()
+    if kind == 'blank':
+        return not text
+    if kind == 'notBlank':
+        return bool(text)
+    needle = str(condition.get('filter') or '').lower()
+    if kind == 'equals':
+        return text == needle
+    if kind == 'notEqual':
+        return text != needle
+    if kind == 'startsWith':
+        return text.startswith(needle)
+    if kind == 'endsWith':
+        return text.endswith(needle)
+    if kind == 'notContains':
+        return needle not in text
+    return needle in text
+
+def _matches_number(value: Any, condition: Dict) -> bool:
+    """Zahlenfilter wie der agNumberColumnFilter."""
+    kind = condition.get('type', 'equals')
+    if kind == 'blank':
+        return value is None
+    if kind == 'notBlank':
+        return value is not None
+    if value is None or condition.get('filter') is None:
+        return False
+    number = float(condition['filter'])
+    if kind == 'notEqual':
+        return value != number
+    if kind == 'lessThan':
+        return value < number
+    if kind == 'lessThanOrEqual':
+        return value <= number
+    if kind == 'greaterThan':
+        return value > number
+    if kind == 'greaterThanOrEqual':
+        return value >= number
+    if kind == 'inRange':
+        return number <= value <= float(condition.get('filterTo', number))
+    return value == number
+
+def _matches_filter(value: Any, model: Dict) -> bool:
+    """Wertet das Filtermodell einer Spalte aus (einzelne oder verknüpfte Bedingungen)."""
+    matches = _matches_number if model.get('filterType') == 'number' else _matches_text
+    conditions = model.get('conditions')
+    if not conditions:
+        return matches(value, model)
+    results = (matches(value, condition) for condition in conditions)
+    return any(results) if model.get('operator') == 'OR' else all(results)
+
+def query_grid_rows(rows: List[Dict], sort_model: List[Dict], filter_model: Dict) -> List[Dict]:
+    """Filtert und sortiert Grid-Zeilen serverseitig wie das Client-Modell des AGGrids.
+    
+    Die Zeilen liegen zeitlich aufsteigend vor (Position = 'idx'); ist das Datum schwächste oder
+    einzige Sortierspalte (Standard: Datum absteigend), genügt daher eine Umkehrung.
+    """
+    for field, model in (filter_model or {}).items():
+        rows = [row for row in rows if _matches_filter(row.get(field), model)]
+    # Mehrfachsortierung: stabil von der schwächsten zur stärksten Sortierspalte
+    for step, sort in enumerate(reversed(sort_model or [])):
+        descending = sort.get('sort') == 'desc'
+        column = sort['colId']
+        if column == 'datetime' and step == 0:
+            # Noch in Zeitordnung (schwächste oder einzige Sortierspalte): Umkehrung genügt
+            rows = rows[::-1] if descending else list(rows)
+        elif column == 'datetime':
+            # 'idx' folgt der Zeitordnung des Gesamtbestands
+            rows = sorted(rows, key=itemgetter('idx'), reverse=descending)
+        else:
+            rows = sorted(rows, key=lambda row: (row[column] is None, row[column]), reverse=descending)
+    return rows
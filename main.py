@@ -1,174 +1,408 @@
 import yaml
 import pandas as pd
+import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
+import asyncio
+import bisect
 import csv
-from typing import List, Dict, Any, Optional
-from nicegui import ui
+import functools
+import json
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from nicegui import app, ui
+from nicegui.json import NiceGUIJSONResponse, dumps as json_dumps, loads as json_loads
+from fastapi import Request
+from fastapi.responses import StreamingResponse
 import io
+import logging
+import os
+import secrets
+import sys
+import threading
+import urllib.parse
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from grid_query import query_grid_rows
+from measurements import (
+    MeasurementArrays, datetimes_to_datetime64,
+    measurements_as_arrays, measurements_as_records, measurements_fingerprint,
+)
 
 # ============================================================================
 # KONFIGURATION LADEN
 # ============================================================================
-import argparse
+def _cli_data_path() -> Optional[str]:
+    """Liest `--data-path PFAD` bzw. `--data-path=PFAD` aus sys.argv, alternativ BREITBAND_DATA_PATH."""
+    argv = sys.argv[1:]
+    for i, arg in enumerate(argv):
+        if arg.startswith('--data-path='):
+            return arg.split('=', 1)[1]
+        if arg == '--data-path' and i + 1 < len(argv):
+            return argv[i + 1]
+    return os.environ.get('BREITBAND_DATA_PATH')
 
-parser = argparse.ArgumentParser(add_help=False)
-parser.add_argument('--data-path', dest='data_path', type=str, default=None)
-args, _ = parser.parse_known_args()
+data_path = _cli_data_path()
 
 with open('config.yaml', 'r') as f:
     config = yaml.safe_load(f)
 
-MEASUREMENTS_PATH = Path(args.data_path) if args.data_path else Path(config['data']['measurements_path'])
+# Diagnoseausgaben über logging statt print; DEBUG-Meldungen nur bei Bedarf aktivieren
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger('breitbandmessung')
+
+MEASUREMENTS_PATH = Path(data_path) if data_path else Path(config['data']['measurements_path'])
 
 # ============================================================================
 # DATENLADEN UND PARSING
 # ============================================================================
-def load_measurements() -> List[Dict[str, Any]]:
-    """Lädt alle CSV-Dateien aus dem Messprotokoll-Verzeichnis."""
-    measurements = []
+def load_measurements(since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Lädt alle CSV-Dateien aus dem Messprotokoll-Verzeichnis.
     
+    Unveränderte Verzeichnisse liefern die gecachte Liste zurück (Cache im Modul measurements,
+    über alle Seitenaufrufe geteilt); sie darf nicht verändert werden. Mit `since` werden ältere Dateien
+    anhand ihres Dateinamens übersprungen und nur Messungen ab dem Stichtag geliefert.
+    
+    Die Messungen sind stets zeitlich aufsteigend (stabil) sortiert; Filter und Ausschnitte
+    erhalten diese Ordnung, nachgelagerte Funktionen sortieren daher nicht erneut.
+    `idx` ist die Position einer Messung in der ungefilterten Liste (`since=None`).
+    """
     if not MEASUREMENTS_PATH.exists():
+        return []
+    measurements = measurements_as_records(MEASUREMENTS_PATH, measurements_fingerprint(MEASUREMENTS_PATH, since))
+    if since is None:
         return measurements
+    return measurements[first_index_from(measurements, since):]
+
+def load_measurements_with_arrays() -> Tuple[List[Dict[str, Any]], MeasurementArrays]:
+    """Wie load_measurements(), zusätzlich als MeasurementArrays (Position = 'idx').
     
-    for csv_file in sorted(MEASUREMENTS_PATH.glob('Breitbandmessung_*.csv')):
-        try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f, delimiter=';')
-                for row in reader:
-                    try:
-                        # Datum und Zeit zusammenführen
-                        date_str = row.get('Messzeitpunkt', '').strip('"')
-                        time_str = row.get('Uhrzeit', '').strip('"')
-                        datetime_str = f"{date_str} {time_str}"
-                        
-                        # Deutsche Datumsformat zu deutschem Objektformat
-                        measurement_date = datetime.strptime(datetime_str, "%d.%m.%Y %H:%M:%S")
-                        
-                        measurements.append({
-                            'datetime': measurement_date,
-                            'date': date_str,
-                            'time': time_str,
-                            'download': float(row.get('Download (Mbit/s)', '0').replace(',', '.')),
-                            'upload': float(row.get('Upload (Mbit/s)', '0').replace(',', '.')),
-                            'ping': float(row.get('Laufzeit (ms)', '0')),
-                            'test_id': row.get('Test-ID', '').strip('"'),
-                            'version': row.get('Version', '').strip('"'),
-                            'os': row.get('Betriebssystem', '').strip('"'),
-                            'browser': row.get('Internet-Browser', '').strip('"'),
-                        })
-                    except ValueError as e:
-                        print(f"Fehler beim Parsen der Zeile: {e}")
-                        continue
-        except Exception as e:
-            print(f"Fehler beim Lesen von {csv_file}: {e}")
-            continue
-    
-    return sorted(measurements, key=lambda x: x['datetime'])
+    Beide stammen aus demselben Verzeichnisstand und sind gecacht; nicht verändern.
+    """
+    if not MEASUREMENTS_PATH.exists():
+        return [], MeasurementArrays.from_records([])
+    fingerprint = measurements_fingerprint(MEASUREMENTS_PATH)
+    return (measurements_as_records(MEASUREMENTS_PATH, fingerprint),
+            measurements_as_arrays(MEASUREMENTS_PATH, fingerprint))
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso_datetime(value: str) -> datetime:
+    """Parst einen ISO-Zeitstempel aus den Grid-/Exportzeilen (gecacht, Zeitstempel wiederholen sich)."""
+    return datetime.fromisoformat(value)
+
+def as_datetime(value) -> datetime:
+    """Liefert Zeitstempel aus Grid-/Exportzeilen als datetime (ISO-Strings werden geparst)."""
+    return _parse_iso_datetime(value) if isinstance(value, str) else value
+
+def first_index_from(measurements: List[Dict], start: datetime) -> int:
+    """Index der ersten Messung ab `start` per Binärsuche (Messungen zeitlich aufsteigend sortiert)."""
+    return bisect.bisect_left(measurements, start, key=itemgetter('datetime'))
+
+def timeframe_cutoff(days: int) -> datetime:
+    """Beginn des Zeitfensters der letzten X Tage."""
+    return datetime.now() - timedelta(days=days)
 
 def filter_measurements_by_timeframe(measurements: List[Dict], days: int) -> List[Dict]:
-    """Filtert Messungen nach Zeitfenster (letzte X Tage)."""
-    cutoff_date = datetime.now() - timedelta(days=days)
-    return [m for m in measurements if m['datetime'] >= cutoff_date]
+    """Filtert bereits geladene Messungen nach Zeitfenster (letzte X Tage).
+    
+    Erwartet zeitlich sortierte Messungen; das Zeitfenster ist dann ein Ausschnitt ab der per
+    Binärsuche gefundenen Grenze. Werden die übrigen Messungen nicht benötigt, ist
+    `load_measurements(since=timeframe_cutoff(days))` günstiger, da ältere Dateien dann nicht geparst werden.
+    """
+    cutoff_date = timeframe_cutoff(days)
+    return measurements[first_index_from(measurements, cutoff_date):]
+
+def timeframe_arrays(arrays: MeasurementArrays, measurements: List[Dict]) -> MeasurementArrays:
+    """Spaltensicht eines Zeitfensters; Zeitfenster sind das Ende der sortierten Gesamtliste."""
+    return arrays[len(arrays) - len(measurements):]
+
+# ============================================================================
+# GRID- UND BERICHTSZEILEN
+# ============================================================================
+def _format_grid_number(value: float, fmt: str) -> str:
+    """Anzeigetext einer Zahlenzelle (leer ohne Wert, wie zuvor der Formatter im Browser)."""
+    return format(value, fmt) if value else ''
+
+def _to_grid_row(m: Dict) -> Dict[str, Any]:
+    """Zeile für das AGGrid (Zeitpunkt als ISO-String).
+    
+    Die *_display-Felder sind fertig formatiert und werden angezeigt; Sortieren und Filtern
+    arbeitet serverseitig auf den Rohwerten (colId der Spalten).
+    """
+    return {
+        'datetime': m['datetime'].isoformat(),
+        'datetime_display': m['datetime'].strftime('%d.%m.%Y %H:%M:%S'),
+        'download': m['download'],
+        'download_display': _format_grid_number(m['download'], '.2f'),
+        'upload': m['upload'],
+        'upload_display': _format_grid_number(m['upload'], '.2f'),
+        'ping': m['ping'],
+        'ping_display': _format_grid_number(m['ping'], '.0f'),
+        'os': m['os'],
+        'browser': m['browser'],
+        'idx': m['idx'],
+    }
+
+def _to_report_row(m: Dict) -> Dict[str, Any]:
+    """Zeile für die Messdaten-Tabelle im BNetzA-Bericht."""
+    return {
+        'Datum/Uhrzeit': m['datetime'].isoformat(),
+        'Download (Mbit/s)': m['download'],
+        'Upload (Mbit/s)': m['upload'],
+        'Ping (ms)': m['ping'],
+        'Betriebssystem': m['os'],
+        'Internet-Browser': m['browser'],
+    }
+
+# Serialisierte Zeilen je Messung: id -> (Messung, Zeile); beim Neuladen geleert
+_grid_row_cache: Dict[int, tuple] = {}
+_report_row_cache: Dict[int, tuple] = {}
+
+def _cached_rows(measurements: List[Dict], cache: Dict[int, tuple], to_row) -> List[Dict[str, Any]]:
+    """Liefert die Zeilen der Messungen; jede Messung wird nur einmal serialisiert.
+    
+    Die Zeilen werden geteilt und dürfen nicht verändert werden.
+    """
+    rows = []
+    for m in measurements:
+        entry = cache.get(id(m))
+        # Messung mitspeichern, damit eine wiederverwendete id nicht auf eine fremde Zeile zeigt
+        if entry is None or entry[0] is not m:
+            entry = cache[id(m)] = (m, to_row(m))
+        rows.append(entry[1])
+    return rows
+
+def grid_rows(measurements: List[Dict]) -> List[Dict[str, Any]]:
+    """Grid-Zeilen der Messungen (gecacht)."""
+    return _cached_rows(measurements, _grid_row_cache, _to_grid_row)
+
+def timeframe_grid_rows(measurements: List[Dict]) -> List[Dict[str, Any]]:
+    """Grid-Zeilen eines Zeitfensters als Ausschnitt von all_grid_rows (Zeitfenster = Ende der Gesamtliste)."""
+    return all_grid_rows[len(all_grid_rows) - len(measurements):]
+
+def report_rows(measurements: List[Dict]) -> List[Dict[str, Any]]:
+    """Berichtszeilen der Messungen (gecacht)."""
+    return _cached_rows(measurements, _report_row_cache, _to_report_row)
+
+def clear_row_caches() -> None:
+    """Verwirft die gecachten Zeilen (nach dem Neuladen der Messungen)."""
+    _grid_row_cache.clear()
+    _report_row_cache.clear()
 
 # ============================================================================
 # STATISTIKFUNKTIONEN
 # ============================================================================
-def calculate_statistics(measurements: List[Dict]) -> Dict[str, Any]:
-    """Berechnet Statistiken für eine Liste von Messungen."""
-    if not measurements:
+def _aggregate_statistics(values) -> Dict[str, Any]:
+    """Berechnet Anzahl, Mittel, Minimum und Maximum über (Download, Upload, Ping)-Tripel in einem Durchlauf."""
+    count = 0
+    sum_dl = sum_ul = sum_ping = 0.0
+    min_dl = min_ul = min_ping = float('inf')
+    max_dl = max_ul = max_ping = float('-inf')
+    
+    for dl, ul, ping in values:
+        count += 1
+        sum_dl += dl
+        sum_ul += ul
+        sum_ping += ping
+        if dl < min_dl:
+            min_dl = dl
+        if dl > max_dl:
+            max_dl = dl
+        if ul < min_ul:
+            min_ul = ul
+        if ul > max_ul:
+            max_ul = ul
+        if ping < min_ping:
+            min_ping = ping
+        if ping > max_ping:
+            max_ping = ping
+    
+    if not count:
         return {
             'count': 0, 'avg_download': 0, 'avg_upload': 0, 'avg_ping': 0,
             'min_download': 0, 'max_download': 0, 'min_upload': 0, 'max_upload': 0,
             'min_ping': 0, 'max_ping': 0
         }
     
-    downloads = [m['download'] for m in measurements]
-    uploads = [m['upload'] for m in measurements]
-    pings = [m['ping'] for m in measurements]
-    
     return {
-        'count': len(measurements),
-        'avg_download': sum(downloads) / len(downloads),
-        'avg_upload': sum(uploads) / len(uploads),
-        'avg_ping': sum(pings) / len(pings),
-        'min_download': min(downloads),
-        'max_download': max(downloads),
-        'min_upload': min(uploads),
-        'max_upload': max(uploads),
-        'min_ping': min(pings),
-        'max_ping': max(pings),
+        'count': count,
+        'avg_download': sum_dl / count,
+        'avg_upload': sum_ul / count,
+        'avg_ping': sum_ping / count,
+        'min_download': min_dl,
+        'max_download': max_dl,
+        'min_upload': min_ul,
+        'max_upload': max_ul,
+        'min_ping': min_ping,
+        'max_ping': max_ping,
     }
 
-def export_to_markdown(rows: List[Dict]) -> str:
-    """Erstellt Markdown-Tabelle aus Messungen."""
-    if not rows:
-        return "# Breitbandmessung Export\n\nKeine Daten verfügbar."
-    
-    markdown = "# Breitbandmessung - Messdaten Export\n\n"
-    markdown += f"**Exportiert am**: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
-    markdown += f"**Anzahl Messungen**: {len(rows)}\n\n"
-    
-    markdown += "## Statistiken\n\n"
-    downloads = [float(r['Download (Mbit/s)']) for r in rows]
-    uploads = [float(r['Upload (Mbit/s)']) for r in rows]
-    pings = [float(r['Ping (ms)']) for r in rows]
-    
-    markdown += f"| Metrik | Wert |\n"
-    markdown += f"|--------|------|\n"
-    markdown += f"| Ø Download | {sum(downloads)/len(downloads):.2f} Mbit/s |\n"
-    markdown += f"| Min Download | {min(downloads):.2f} Mbit/s |\n"
-    markdown += f"| Max Download | {max(downloads):.2f} Mbit/s |\n"
-    markdown += f"| Ø Upload | {sum(uploads)/len(uploads):.2f} Mbit/s |\n"
-    markdown += f"| Min Upload | {min(uploads):.2f} Mbit/s |\n"
-    markdown += f"| Max Upload | {max(uploads):.2f} Mbit/s |\n"
-    markdown += f"| Ø Ping | {sum(pings)/len(pings):.2f} ms |\n"
-    markdown += f"| Min Ping | {min(pings):.2f} ms |\n"
-    markdown += f"| Max Ping | {max(pings):.2f} ms |\n\n"
-    
-    markdown += "## Messdaten\n\n"
-    markdown += "| Datum/Uhrzeit | Download | Upload | Ping | OS | Browser |\n"
-    markdown += "|---|---|---|---|---|---|\n"
-    for row in rows:
-        markdown += f"| {row['Datum/Uhrzeit']} | {row['Download (Mbit/s)']} | {row['Upload (Mbit/s)']} | {row['Ping (ms)']} | {row['Betriebssystem']} | {row['Internet-Browser']} |\n"
+def calculate_statistics(measurements: List[Dict]) -> Dict[str, Any]:
+    """Berechnet Statistiken für eine Liste von Messungen."""
+    return _aggregate_statistics(map(itemgetter('download', 'upload', 'ping'), measurements))
+
+def calculate_array_statistics(arrays: MeasurementArrays, indices=None) -> Dict[str, Any]:
+    """Berechnet Statistiken per NumPy-Reduktion (optional nur für Indexarray oder Slice `indices`)."""
+    if indices is not None:
+        arrays = arrays[indices]
+    if not len(arrays):
+        return _aggregate_statistics(())
+    stats = {'count': len(arrays)}
+    for name in ('download', 'upload', 'ping'):
+        values = getattr(arrays, name)
+        stats[f'avg_{name}'] = float(values.mean())
+        stats[f'min_{name}'] = float(values.min())
+        stats[f'max_{name}'] = float(values.max())
+    return stats
+
+@functools.lru_cache(maxsize=8)
+def timeframe_statistics(start: int) -> Dict[str, Any]:
+    """Statistiken von all_arrays ab Position `start` (Zeitfenster-Grenze); gecacht, beim Neuladen geleert.
+    
+    Schlüssel ist die Grenze statt des Zeitraums, da sich das Fenster mit der Uhrzeit verschiebt.
+    Das Ergebnis wird geteilt und darf nicht verändert werden.
+    """
+    return calculate_array_statistics(all_arrays, slice(start, None))
+
+# Zeilen der Statistik-Tabelle: (Bezeichnung, Statistik-Schlüssel)
+STATS_TABLE_METRICS = [
+    ('Anzahl Messungen', 'count'),
+    ('Ø Download (Mbit/s)', 'avg_download'),
+    ('Min Download', 'min_download'),
+    ('Max Download', 'max_download'),
+    ('Ø Upload (Mbit/s)', 'avg_upload'),
+    ('Min Upload', 'min_upload'),
+    ('Max Upload', 'max_upload'),
+    ('Ø Ping (ms)', 'avg_ping'),
+    ('Min Ping', 'min_ping'),
+    ('Max Ping', 'max_ping'),
+]
+
+def _format_stat(key: str, value: Any) -> Any:
+    """Formatiert einen Statistikwert für die Tabelle (Anzahl unformatiert, fehlende Werte als '-')."""
+    if value is None:
+        return '-'
+    return value if key == 'count' else f"{value:.2f}"
+
+def build_stats_rows(stats: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Zeilen der Statistik-Tabelle mit formatierter Gesamt-Spalte; die Auswahl-Spalte ist leer ('-')."""
+    return [
+        {'metric': label, 'gesamt': _format_stat(key, stats[key]), 'auswahl': '-'}
+        for label, key in STATS_TABLE_METRICS
+    ]
+
+def set_selection_column(rows: List[Dict[str, Any]], auswahl: Optional[Dict[str, Any]]) -> bool:
+    """Setzt nur die Auswahl-Spalte der Statistik-Zeilen (in place); ohne Auswahl überall '-'.
+    
+    Liefert, ob sich ein angezeigter Wert geändert hat (sonst muss die Tabelle nicht neu gesendet werden).
+    """
+    changed = False
+    for row, (_label, key) in zip(rows, STATS_TABLE_METRICS):
+        value = _format_stat(key, auswahl[key] if auswahl else None)
+        if row['auswahl'] != value:
+            row['auswahl'] = value
+            changed = True
+    return changed
+
+def calculate_row_statistics(rows: List[Dict]) -> Dict[str, Any]:
+    """Berechnet Statistiken für Export-Zeilen (Spaltennamen wie im PDF-Export)."""
+    return _aggregate_statistics(
+        (float(r['Download (Mbit/s)']), float(r['Upload (Mbit/s)']), float(r['Ping (ms)'])) for r in rows
+    )
+
+# Ab dieser Punktanzahl zeichnet das PDF-Diagramm Linien ohne Marker
+CHART_MARKER_LIMIT = 200
+# Höchstzahl gezeichneter Punkte je Linie in Zeitserien-Plot und PDF-Diagramm (mehr trennt die Auflösung
+# ohnehin nicht); konfigurierbar über plot.max_points
+PLOT_MAX_POINTS = int(config['plot'].get('max_points', 2000))
+# Gerenderte Plot-SVGs je Chip-Kombination (je bis ~1 MB), die beim Umschalten wiederverwendet werden
+PLOT_SVG_CACHE_SIZE = 4
+
+def downsample_lttb(values: np.ndarray, threshold: int) -> np.ndarray:
+    """Wählt per Largest-Triangle-Three-Buckets bis zu threshold Positionen, die den Verlauf erhalten.
     
-    return markdown
+    Erster und letzter Punkt bleiben immer erhalten; x ist die Position in der Reihe.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    y = np.asarray(values, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    picks = np.empty(threshold, dtype=np.intp)
+    picks[0], picks[-1] = 0, n - 1
+    
+    prev = 0
+    for b in range(threshold - 2):
+        start, end = edges[b], edges[b + 1]
+        # Schwerpunkt des folgenden Buckets (bzw. der letzte Punkt) als dritte Ecke
+        next_end = edges[b + 2] if b + 2 < len(edges) else n
+        next_x = (end + max(next_end, end + 1) - 1) / 2
+        next_y = y[end:max(next_end, end + 1)].mean()
+        xs = np.arange(start, end)
+        # Doppelte Dreiecksfläche genügt für die Auswahl des Maximums
+        area = np.abs((prev - next_x) * (y[start:end] - y[prev]) - (prev - xs) * (next_y - y[prev]))
+        prev = start + int(area.argmax())
+        picks[b + 1] = prev
+    
+    return picks
 
 def generate_chart(rows: List[Dict]) -> bytes:
     """Erstellt ein Diagramm mit Download, Upload und Ping mit Datum/Uhrzeit auf X-Achse."""
     if not rows:
         return b''
     
+    # Inhalt der Zeilen als Cache-Schlüssel: gleiche Auswahl -> gleiches PNG
+    key = tuple(
+        (r['Datum/Uhrzeit'], float(r['Download (Mbit/s)']), float(r['Upload (Mbit/s)']), float(r['Ping (ms)']))
+        for r in rows
+    )
+    return _generate_chart_cached(key)
+
+@functools.lru_cache(maxsize=16)
+def _generate_chart_cached(key: tuple) -> bytes:
+    """Rendert das Diagramm für einen Inhalts-Schlüssel aus generate_chart (gecacht)."""
     # Daten extrahieren
-    datetimes = [datetime.fromisoformat(r['Datum/Uhrzeit']) if isinstance(r['Datum/Uhrzeit'], str) and 'T' in r['Datum/Uhrzeit'] 
-                 else r['Datum/Uhrzeit'] for r in rows]
-    downloads = [float(r['Download (Mbit/s)']) for r in rows]
-    uploads = [float(r['Upload (Mbit/s)']) for r in rows]
-    pings = [float(r['Ping (ms)']) for r in rows]
+    datetimes = [dt for dt, _, _, _ in key]
+    values = np.fromiter(((dl, ul, ping) for _, dl, ul, ping in key), dtype=np.dtype('f4,f4,f4'), count=len(key))
+    downloads, uploads, pings = values['f0'], values['f1'], values['f2']
+    
+    # Plot erstellen (ohne pyplot: kein globaler Figure-Manager, kein Lock)
+    fig = Figure(figsize=(12, 6))
+    FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(2, 1)
     
-    # Plot erstellen
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 6))
+    x_pos = np.arange(len(datetimes), dtype=np.int32)
     
-    x_pos = range(len(datetimes))
+    # Marker nur bei wenigen Punkten; bei langen Reihen dominiert sonst das Zeichnen der Glyphen
+    if len(x_pos) <= CHART_MARKER_LIMIT:
+        dl_fmt, ul_fmt, ping_fmt, line_style = 'b-o', 'g-s', 'r-^', {'linewidth': 2, 'markersize': 4}
+    else:
+        dl_fmt, ul_fmt, ping_fmt, line_style = 'b-', 'g-', 'r-', {'linewidth': 1}
+    
+    # Lange Reihen je Linie per LTTB reduzieren (Statistiken nutzen weiter alle Werte)
+    def _line(values):
+        picks = downsample_lttb(values, PLOT_MAX_POINTS)
+        return x_pos[picks], values[picks]
     
     # Download/Upload Plot
-    ax1.plot(x_pos, downloads, 'b-o', label='Download', linewidth=2, markersize=4)
-    ax1.plot(x_pos, uploads, 'g-s', label='Upload', linewidth=2, markersize=4)
+    ax1.plot(*_line(downloads), dl_fmt, label='Download', **line_style)
+    ax1.plot(*_line(uploads), ul_fmt, label='Upload', **line_style)
     ax1.set_ylabel('Mbit/s', fontsize=10)
     ax1.set_title('Download & Upload', fontsize=12, fontweight='bold')
     ax1.legend()
     ax1.grid(True, alpha=0.3)
     
     # Ping Plot
-    ax2.plot(x_pos, pings, 'r-^', label='Ping', linewidth=2, markersize=4)
+    ax2.plot(*_line(pings), ping_fmt, label='Ping', **line_style)
     ax2.set_ylabel('ms', fontsize=10)
     ax2.set_xlabel('Zeit', fontsize=10)
     ax2.set_title('Laufzeit (Ping)', fontsize=12, fontweight='bold')
@@ -176,14 +410,14 @@ def generate_chart(rows: List[Dict]) -> bytes:
     ax2.grid(True, alpha=0.3)
     
     # X-Achsen Labels mit Datum/Uhrzeit
-    # Zeige alle 5. Label um Überlappung zu vermeiden
+    # Ticks nur an den beschrifteten Positionen (etwa 10), nur diese Zeitpunkte formatieren
     label_interval = max(1, len(datetimes) // 10)
-    x_labels = [dt.strftime('%d.%m\n%H:%M') if i % label_interval == 0 else '' 
-                for i, dt in enumerate(datetimes)]
+    ticks = x_pos[::label_interval]
+    x_labels = [as_datetime(datetimes[i]).strftime('%d.%m\n%H:%M') for i in ticks]
     
-    ax1.set_xticks(x_pos)
+    ax1.set_xticks(ticks)
     ax1.set_xticklabels(x_labels, fontsize=8)
-    ax2.set_xticks(x_pos)
+    ax2.set_xticks(ticks)
     ax2.set_xticklabels(x_labels, fontsize=8)
     
     # Tight layout für bessere Spacing
@@ -191,14 +425,25 @@ def generate_chart(rows: List[Dict]) -> bytes:
     
     # In BytesIO speichern
     img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=100, bbox_inches='tight')
-    img_buffer.seek(0)
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=100, bbox_inches='tight')
     
     return img_buffer.getvalue()
 
-def markdown_to_pdf(markdown_content: str, rows: List[Dict], filename: str = "messdaten_export.pdf") -> bytes:
-    """Konvertiert Markdown zu PDF mit Tabellen und Chart."""
+def _chart_flowables(chart_png: Optional[bytes]) -> list:
+    """Bettet ein gerendertes Diagramm-PNG in den PDF-Story-Ablauf ein (leer ohne Bild)."""
+    if not chart_png:
+        return []
+    return [Image(io.BytesIO(chart_png), width=6*inch, height=3.6*inch), Spacer(1, 0.2*inch)]
+
+def render_table_pdf(rows: List[Dict], chart_png: Optional[bytes] = None,
+                     stats: Optional[Dict[str, Any]] = None, exported_at: Optional[datetime] = None) -> io.BytesIO:
+    """Erstellt das Export-PDF mit Statistik, Chart und Messdaten-Tabelle direkt aus den Zeilen
+    (Puffer steht auf Position 0).
+    
+    Bereits gerendertes Diagramm (`chart_png`) und berechnete Statistiken (`stats`) können übergeben
+    werden, sonst werden sie aus `rows` erzeugt. `exported_at` ist der gedruckte Exportzeitpunkt
+    (Standard: jetzt); der Aufrufer übergibt ihn, damit Dateiname und PDF übereinstimmen.
+    """
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
     styles_dict = get_pdf_styles()
@@ -210,27 +455,26 @@ def markdown_to_pdf(markdown_content: str, rows: List[Dict], filename: str = "me
     story.append(Spacer(1, 0.1*inch))
     
     # Meta Info
-    meta_text = f"<b>Exportiert am:</b> {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}<br/><b>Anzahl Messungen:</b> {len(rows)}"
+    meta_text = f"<b>Exportiert am:</b> {(exported_at or datetime.now()).strftime('%d.%m.%Y %H:%M:%S')}<br/><b>Anzahl Messungen:</b> {len(rows)}"
     story.append(Paragraph(meta_text, styles_dict['normal']))
     story.append(Spacer(1, 0.2*inch))
     
     # Statistik Tabelle
     story.append(Paragraph("Statistiken", styles_dict['heading']))
-    downloads = [float(r['Download (Mbit/s)']) for r in rows]
-    uploads = [float(r['Upload (Mbit/s)']) for r in rows]
-    pings = [float(r['Ping (ms)']) for r in rows]
+    if stats is None:
+        stats = calculate_row_statistics(rows)
     
     stats_data = [
         ['Metrik', 'Wert'],
-        ['Ø Download', f"{sum(downloads)/len(downloads):.2f} Mbit/s"],
-        ['Min Download', f"{min(downloads):.2f} Mbit/s"],
-        ['Max Download', f"{max(downloads):.2f} Mbit/s"],
-        ['Ø Upload', f"{sum(uploads)/len(uploads):.2f} Mbit/s"],
-        ['Min Upload', f"{min(uploads):.2f} Mbit/s"],
-        ['Max Upload', f"{max(uploads):.2f} Mbit/s"],
-        ['Ø Ping', f"{sum(pings)/len(pings):.2f} ms"],
-        ['Min Ping', f"{min(pings):.2f} ms"],
-        ['Max Ping', f"{max(pings):.2f} ms"],
+        ['Ø Download', f"{stats['avg_download']:.2f} Mbit/s"],
+        ['Min Download', f"{stats['min_download']:.2f} Mbit/s"],
+        ['Max Download', f"{stats['max_download']:.2f} Mbit/s"],
+        ['Ø Upload', f"{stats['avg_upload']:.2f} Mbit/s"],
+        ['Min Upload', f"{stats['min_upload']:.2f} Mbit/s"],
+        ['Max Upload', f"{stats['max_upload']:.2f} Mbit/s"],
+        ['Ø Ping', f"{stats['avg_ping']:.2f} ms"],
+        ['Min Ping', f"{stats['min_ping']:.2f} ms"],
+        ['Max Ping', f"{stats['max_ping']:.2f} ms"],
     ]
     
     stats_table = Table(stats_data, colWidths=[3*inch, 2*inch])
@@ -240,39 +484,14 @@ def markdown_to_pdf(markdown_content: str, rows: List[Dict], filename: str = "me
     
     # Chart
     story.append(Paragraph("Visualisierung", styles_dict['heading']))
-    chart_img_bytes = generate_chart(rows)
-    if chart_img_bytes:
-        chart_buffer = io.BytesIO(chart_img_bytes)
-        chart_img = Image(chart_buffer, width=6*inch, height=3.6*inch)
-        story.append(chart_img)
-        story.append(Spacer(1, 0.2*inch))
+    story.extend(_chart_flowables(chart_png if chart_png is not None else generate_chart(rows)))
     
     # Messdaten Tabelle
     story.append(PageBreak())
     story.append(Paragraph("Messdaten", styles_dict['heading']))
     
     # Messdaten kompakt formatieren
-    header = ['Datum/Uhrzeit', 'Download', 'Upload', 'Ping', 'OS', 'Browser']
-    body = []
-    for row in rows:
-        # Datum lesbar
-        dt_disp = row['Datum/Uhrzeit']
-        try:
-            dt_disp = datetime.fromisoformat(row['Datum/Uhrzeit']).strftime('%d.%m.%Y %H:%M:%S')
-        except Exception:
-            pass
-        body.append([
-            Paragraph(dt_disp, styles_dict['small']),
-            Paragraph(f"{float(row['Download (Mbit/s)']):.2f}", styles_dict['small']),
-            Paragraph(f"{float(row['Upload (Mbit/s)']):.2f}", styles_dict['small']),
-            Paragraph(f"{float(row['Ping (ms)']):.0f}", styles_dict['small']),
-            Paragraph(str(row['Betriebssystem']), styles_dict['small']),
-            Paragraph(str(row['Internet-Browser']), styles_dict['small']),
-        ])
-
-    measurements_table = Table([header] + body, colWidths=[1.8*inch, 0.9*inch, 0.9*inch, 0.6*inch, 1.0*inch, 2.4*inch])
-    measurements_table.setStyle(get_header_table_style())
-    story.append(measurements_table)
+    story.append(build_measurements_table(rows))
     
     # PDF-Metadaten setzen
     def _set_info(canvas, _doc):
@@ -282,10 +501,23 @@ def markdown_to_pdf(markdown_content: str, rows: List[Dict], filename: str = "me
 
     doc.build(story, onFirstPage=_set_info, onLaterPages=_set_info)
     buffer.seek(0)
-    return buffer.getvalue()
+    return buffer
+
+def build_export_pdf(rows: List[Dict], exported_at: Optional[datetime] = None) -> io.BytesIO:
+    """PDF-Export ausgewählter Zeilen; Statistik und Diagramm werden je Export nur einmal berechnet."""
+    stats = calculate_row_statistics(rows)
+    return render_table_pdf(rows, chart_png=generate_chart(rows), stats=stats, exported_at=exported_at)
 
-def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload: float, selected_rows: List[Dict]) -> bytes:
-    """Erstellt einen professionellen BNetzA-Prüfbericht als PDF."""
+def _format_mbit(value: float | None) -> str:
+    """Formatiert einen Messwert in Mbit/s; fehlende Werte als „—“."""
+    return '—' if value is None else f"{value:.2f} Mbit/s"
+
+def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload: float, selected_rows: List[Dict],
+                        generated_at: Optional[datetime] = None) -> io.BytesIO:
+    """Erstellt einen professionellen BNetzA-Prüfbericht als PDF (Puffer steht auf Position 0).
+    
+    `generated_at` ist der gedruckte Erstellungszeitpunkt (Standard: jetzt).
+    """
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
     styles_dict = get_pdf_styles()
@@ -294,7 +526,7 @@ def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload:
     
     # Titel
     story.append(Paragraph("Prüfzusammenfassung gemäß BNetzA-Anforderungen (informativ)", styles_dict['title']))
-    story.append(Paragraph(f"<b>Generiert:</b> {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}", styles_dict['normal']))
+    story.append(Paragraph(f"<b>Generiert:</b> {(generated_at or datetime.now()).strftime('%d.%m.%Y %H:%M:%S')}", styles_dict['normal']))
     story.append(Spacer(1, 0.05*inch))
     story.append(Paragraph(
         "Diese Auswertung ist eine Orientierung anhand Ihrer Messreihen (Breitbandmessung Desktop-App).\n"
@@ -349,12 +581,12 @@ def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload:
         ['Gesamte Messungen', str(stats['total_measurements'])],
         ['Messtage', str(stats['dates'])],
         ['Zeitraum', stats['date_range']],
-        ['Ø Download', f"{stats['avg_download']:.2f} Mbit/s"],
-        ['Min Download', f"{stats['min_download']:.2f} Mbit/s"],
-        ['Max Download', f"{stats['max_download']:.2f} Mbit/s"],
-        ['Ø Upload', f"{stats['avg_upload']:.2f} Mbit/s"],
-        ['Min Upload', f"{stats['min_upload']:.2f} Mbit/s"],
-        ['Max Upload', f"{stats['max_upload']:.2f} Mbit/s"],
+        ['Ø Download', _format_mbit(stats['avg_download'])],
+        ['Min Download', _format_mbit(stats['min_download'])],
+        ['Max Download', _format_mbit(stats['max_download'])],
+        ['Ø Upload', _format_mbit(stats['avg_upload'])],
+        ['Min Upload', _format_mbit(stats['min_upload'])],
+        ['Max Upload', _format_mbit(stats['max_upload'])],
         ['90% erreicht (DL/UL)', f"{stats.get('reached_90_pct_days_dl', 0)}/3 / {stats.get('reached_90_pct_days_ul', 0)}/3"],
         ['Minimalgeschwindigkeit unterschritten (DL/UL)', f"{stats.get('below_min_days_dl', 0)}/3 / {stats.get('below_min_days_ul', 0)}/3"],
         ['Normalgeschwindigkeit ≥ Vertrag (DL/UL)', f"{stats.get('percentage_normal_dl', 0.0):.1f}% / {stats.get('percentage_normal_ul', 0.0):.1f}%"],
@@ -366,9 +598,10 @@ def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload:
     
     # Vereinfachte Minderung nach §57 Abs. 4 TKG (Satz 2)
     # Annahme: vertraglich maximal/normal/minimal = contract_* (vereinfachter Fall)
-    try:
-        avg_dl = float(stats.get('avg_download', 0.0))
-        avg_ul = float(stats.get('avg_upload', 0.0))
+    # Ohne Messwert-Statistik (Fehlerpfad der Prüfung: avg_* = None) entfällt die Tabelle
+    if stats.get('avg_download') is not None and stats.get('avg_upload') is not None:
+        avg_dl = float(stats['avg_download'])
+        avg_ul = float(stats['avg_upload'])
         c_dl = float(stats.get('contract_download', contract_download))
         c_ul = float(stats.get('contract_upload', contract_upload))
         ratio_dl = min(avg_dl / c_dl, 1.0) if c_dl > 0 else 1.0
@@ -387,8 +620,6 @@ def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload:
         mind_table.setStyle(get_header_table_style())
         story.append(mind_table)
         story.append(Paragraph("Hinweis: Vereinfachte Berechnung. Maßgeblich sind die Vorgaben der BNetzA und Ihr individueller Vertrag.", styles_dict['normal']))
-    except Exception:
-        pass
     
     # Warnungen
     if result['warnings']:
@@ -409,25 +640,7 @@ def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload:
     story.append(Paragraph("Gemessene Daten", styles_dict['heading']))
     
     # Messdaten kompakt formatieren wie im normalen Export
-    header = ['Datum/Uhrzeit', 'Download', 'Upload', 'Ping', 'OS', 'Browser']
-    body = []
-    for row in selected_rows:
-        dt_disp = row['Datum/Uhrzeit']
-        try:
-            dt_disp = datetime.fromisoformat(row['Datum/Uhrzeit']).strftime('%d.%m.%Y %H:%M:%S')
-        except Exception:
-            pass
-        body.append([
-            Paragraph(dt_disp, styles_dict['small']),
-            Paragraph(f"{float(row['Download (Mbit/s)']):.2f}", styles_dict['small']),
-            Paragraph(f"{float(row['Upload (Mbit/s)']):.2f}", styles_dict['small']),
-            Paragraph(f"{float(row['Ping (ms)']):.0f}", styles_dict['small']),
-            Paragraph(str(row['Betriebssystem']), styles_dict['small']),
-            Paragraph(str(row['Internet-Browser']), styles_dict['small']),
-        ])
-    measurements_table = Table([header] + body, colWidths=[1.8*inch, 0.9*inch, 0.9*inch, 0.6*inch, 1.0*inch, 2.4*inch])
-    measurements_table.setStyle(get_header_table_style())
-    story.append(measurements_table)
+    story.append(build_measurements_table(selected_rows))
     
     # PDF-Metadaten setzen
     def _set_info(canvas, _doc):
@@ -437,13 +650,22 @@ def generate_bnetza_pdf(result: Dict, contract_download: float, contract_upload:
 
     doc.build(story, onFirstPage=_set_info, onLaterPages=_set_info)
     buffer.seek(0)
-    return buffer.getvalue()
+    return buffer
 
 # ============================================================================
 # PDF HELPER FUNCTIONS
 # ============================================================================
-def get_pdf_styles():
-    """Gibt alle benötigten PDF-Styles zurück."""
+def format_row_datetimes(rows: List[Dict]) -> List[str]:
+    """Formatiert 'Datum/Uhrzeit' aller Zeilen als TT.MM.JJJJ HH:MM:SS.
+    
+    ISO-Zeitstempel werden in einem vektorisierten Aufruf geparst; andere Werte bleiben unverändert.
+    """
+    raw = pd.Series([r['Datum/Uhrzeit'] for r in rows], dtype=object)
+    parsed = pd.to_datetime(raw, format='ISO8601', errors='coerce')
+    return parsed.dt.strftime('%d.%m.%Y %H:%M:%S').fillna(raw.astype(str)).tolist()
+
+def _build_pdf_styles():
+    """Erstellt alle benötigten PDF-Styles."""
     styles = getSampleStyleSheet()
     
     return {
@@ -496,8 +718,8 @@ def get_pdf_styles():
         ),
     }
 
-def get_header_table_style():
-    """Header-Tabellen-Style."""
+def _build_header_table_style():
+    """Erstellt den Header-Tabellen-Style."""
     return TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -510,10 +732,109 @@ def get_header_table_style():
         ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
     ])
 
+# Styles hängen von keinem Aufruf ab -> einmalig beim Import erstellen und teilen
+PDF_STYLES = _build_pdf_styles()
+HEADER_TABLE_STYLE = _build_header_table_style()
+
+def get_pdf_styles():
+    """Gibt alle benötigten PDF-Styles zurück."""
+    return PDF_STYLES
+
+def get_header_table_style():
+    """Header-Tabellen-Style (geteilte Instanz; Table.setStyle übernimmt nur die Kommandos)."""
+    return HEADER_TABLE_STYLE
+
+# Messdaten-Tabellen: Zellen sind einfache Strings, Schrift kommt aus dem TableStyle statt aus Paragraphs
+MEASUREMENTS_TABLE_STYLE = TableStyle(HEADER_TABLE_STYLE.getCommands() + [
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('LEADING', (0, 1), (-1, -1), 11),
+    ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+])
+MEASUREMENTS_TABLE_COL_WIDTHS = [1.8*inch, 0.9*inch, 0.9*inch, 0.6*inch, 1.0*inch, 2.4*inch]
+# Ab dieser Länge (Zeichen) wird ein Text umbrochen, damit er nicht über die Spalte hinausläuft
+MEASUREMENTS_TABLE_WRAP = {'os': 16, 'browser': 38}
+
+def _table_text(value: Any, wrap_at: int):
+    """Gibt den Zellentext als String zurück; nur überlange Texte werden als Paragraph umbrochen."""
+    text = str(value)
+    if len(text) <= wrap_at:
+        return text
+    return Paragraph(escape(text), PDF_STYLES['small'])
+
+def build_measurements_table(rows: List[Dict]) -> Table:
+    """Erstellt die kompakte Messdaten-Tabelle für die PDF-Exporte."""
+    header = ['Datum/Uhrzeit', 'Download', 'Upload', 'Ping', 'OS', 'Browser']
+    body = []
+    # Datum lesbar (einmal vektorisiert für alle Zeilen)
+    dt_disp_all = format_row_datetimes(rows)
+    for row, dt_disp in zip(rows, dt_disp_all):
+        body.append([
+            dt_disp,
+            f"{float(row['Download (Mbit/s)']):.2f}",
+            f"{float(row['Upload (Mbit/s)']):.2f}",
+            f"{float(row['Ping (ms)']):.0f}",
+            _table_text(row['Betriebssystem'], MEASUREMENTS_TABLE_WRAP['os']),
+            _table_text(row['Internet-Browser'], MEASUREMENTS_TABLE_WRAP['browser']),
+        ])
+    
+    measurements_table = Table([header] + body, colWidths=MEASUREMENTS_TABLE_COL_WIDTHS)
+    measurements_table.setStyle(MEASUREMENTS_TABLE_STYLE)
+    return measurements_table
+
 # ============================================================================
 # BNETZA CHECKER
 # ============================================================================
-def check_bnetza_requirements(measurements: List[Dict], contract_download: float, contract_upload: float) -> Dict[str, Any]:
+# Begründungstexte der Minderleistung je Richtung (Download/Upload)
+BNETZA_REASON_90_PCT = '{}: Nur {}/3 Tagen 90% erreicht'
+BNETZA_REASON_NORMAL = '{}: {:.1f}% Messungen mit Normalgeschwindigkeit (benötigt 90%)'
+BNETZA_REASON_BELOW_MIN = '{}: Minimale Geschwindigkeit an {} Tagen unterschritten'
+
+@functools.lru_cache(maxsize=128)
+def _bnetza_thresholds(contract_download: float, contract_upload: float) -> tuple:
+    """Schwellen je (Download, Upload): Normalgeschwindigkeit (= Vertrag), 90 % und Minimum (30 %, BNetzA-Standard)."""
+    return (
+        (contract_download, contract_upload),
+        (contract_download * 0.9, contract_upload * 0.9),
+        (contract_download * 0.3, contract_upload * 0.3),
+    )
+
+def _bnetza_conditions(values: np.ndarray, normal_speed: tuple,
+                       threshold_90_pct: tuple, min_speed: tuple) -> tuple:
+    """Numerischer Kern der Minderleistungsprüfung über ein (Richtung x Tage x Messungen)-Array.
+    
+    Schwellen werden als (Download, Upload) übergeben; geliefert werden je Richtung als Arrays
+    [Download, Upload]: Tage mit 90 %, Anteil Normalgeschwindigkeit in %, Tage unter Minimum,
+    sowie Mittel, Minimum und Maximum.
+    """
+    normal = np.asarray(normal_speed, dtype=np.float64).reshape(2, 1, 1)
+    reach = np.asarray(threshold_90_pct, dtype=np.float64).reshape(2, 1, 1)
+    minimum = np.asarray(min_speed, dtype=np.float64).reshape(2, 1, 1)
+    
+    # Tagesmaximum/-minimum einmal reduzieren statt Vergleichsmatrizen per any() auszuwerten
+    day_max = values.max(axis=2)
+    day_min = values.min(axis=2)
+    days_reached_90_pct = (day_max >= reach[:, :, 0]).sum(axis=1)
+    pct_normal = ((values >= normal).sum(axis=(1, 2)) / values[0].size) * 100
+    days_below_min = (day_min < minimum[:, :, 0]).sum(axis=1)
+    return (days_reached_90_pct, pct_normal, days_below_min,
+            values.mean(axis=(1, 2)), day_min.min(axis=1), day_max.max(axis=1))
+
+def _empty_stats(total: int, dates: int, date_range: str) -> Dict[str, Any]:
+    """Statistik-Dict für den Fehlerfall: nur Eckdaten, Messwerte als None (Anzeige: „—“)."""
+    return {
+        'total_measurements': total,
+        'dates': dates,
+        'date_range': date_range,
+        'avg_download': None, 'min_download': None, 'max_download': None,
+        'avg_upload': None, 'min_upload': None, 'max_upload': None,
+        'contract_download': 0, 'contract_upload': 0,
+        'reached_90_pct_days_dl': 0, 'reached_90_pct_days_ul': 0,
+        'below_min_days_dl': 0, 'below_min_days_ul': 0,
+        'percentage_normal_dl': 0, 'percentage_normal_ul': 0,
+    }
+
+def _check_bnetza_requirements(measurements: List[Dict] | MeasurementArrays, contract_download: float, contract_upload: float) -> Dict[str, Any]:
     """
     Prüft BNetzA-Anforderungen für Minderleistung bei Festnetz-Internetzugängen.
     Eine Minderleistung liegt vor, wenn MINDESTENS EINE dieser Bedingungen erfüllt ist:
@@ -525,10 +846,10 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
     4. 30 Messungen an 3 unterschiedlichen Kalendertagen (10 pro Tag)
     5. Max. 14 Kalendertage Gesamtdauer, min. 1 Tag Abstand zwischen Messtagen
     6. Zwischen 5. und 6. Messung: min. 3 Stunden; zwischen anderen: min. 5 Minuten
+    Erwartet zeitlich aufsteigend sortierte Messungen (wie von load_measurements geliefert),
+    als Liste von Dicts oder bereits als MeasurementArrays.
     """
     
-    from collections import defaultdict
-    
     result = {
         'valid': False,
         'errors': [],
@@ -543,45 +864,33 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
         result['errors'].append(f'Es werden mindestens 30 Messungen benötigt, gefunden: {len(measurements)}')
         return result
     
-    print(f"DEBUG: check_bnetza_requirements gestartet mit {len(measurements)} Messungen")
-    
-    # ========== ANFORDERUNG 4: Gruppiere nach Datum ==========
-    by_date = defaultdict(list)
-    dates = set()
+    log.debug("BNetzA-Prüfung gestartet mit %d Messungen", len(measurements))
     
-    for m in measurements:
-        date = m['datetime'].date()
-        dates.add(date)
-        by_date[date].append(m)
+    # Messwerte einmalig spaltenweise (zeitlich sortiert, Tage liegen zusammenhängend)
+    if not isinstance(measurements, MeasurementArrays):
+        measurements = MeasurementArrays.from_records(measurements)
+    total = len(measurements)
+    downloads = measurements.download
+    uploads = measurements.upload
     
-    sorted_dates = sorted(dates)
+    # ========== ANFORDERUNG 4: Gruppiere nach Datum ==========
+    # Sortierte Kalendertage -> Starts und Anzahl je Tag in einem Schritt
+    days, day_starts, day_counts = np.unique(
+        measurements.datetimes.astype('datetime64[D]'), return_index=True, return_counts=True
+    )
+    sorted_dates = days.astype(object).tolist()
     
     # Prüfe auf genau 3 Tage
     if len(sorted_dates) != 3:
         result['errors'].append(f'Es werden genau 3 unterschiedliche Tage benötigt, gefunden: {len(sorted_dates)}')
-        # Initialisiere stats bei Fehler
-        all_downloads = [m['download'] for m in measurements]
-        all_uploads = [m['upload'] for m in measurements]
-        result['stats'] = {
-            'total_measurements': len(measurements),
-            'dates': len(sorted_dates),
-            'date_range': f'{sorted_dates[0]} bis {sorted_dates[-1]}' if sorted_dates else 'N/A',
-            'avg_download': sum(all_downloads) / len(all_downloads) if all_downloads else 0,
-            'min_download': min(all_downloads) if all_downloads else 0,
-            'max_download': max(all_downloads) if all_downloads else 0,
-            'avg_upload': sum(all_uploads) / len(all_uploads) if all_uploads else 0,
-            'min_upload': min(all_uploads) if all_uploads else 0,
-            'max_upload': max(all_uploads) if all_uploads else 0,
-            'contract_download': 0, 'contract_upload': 0,
-            'reached_90_pct_days_dl': 0, 'reached_90_pct_days_ul': 0,
-            'below_min_days_dl': 0, 'below_min_days_ul': 0,
-            'percentage_normal_dl': 0, 'percentage_normal_ul': 0,
-        }
+        # Bei Fehler nur Eckdaten; Mittel-/Extremwerte werden nicht berechnet
+        result['stats'] = _empty_stats(
+            total, len(sorted_dates), f'{sorted_dates[0]} bis {sorted_dates[-1]}' if sorted_dates else 'N/A'
+        )
         return result
     
     # 10 Messungen pro Tag?
-    for date in sorted_dates:
-        count = len(by_date[date])
+    for date, count in zip(sorted_dates, day_counts.tolist()):
         if count != 10:
             result['errors'].append(f'Tag {date}: {count} Messungen gefunden (benötigt: 10)')
     
@@ -589,14 +898,15 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
         return result
     
     # ========== ANFORDERUNG 5: Max. 14 Tage Gesamtdauer? ==========
-    duration_days = (sorted_dates[-1] - sorted_dates[0]).days
+    # Tagesabstände als ganze Zahlen direkt aus datetime64[D]
+    day_offsets = days.astype(np.int64)
+    duration_days = int(day_offsets[-1] - day_offsets[0])
     if duration_days > 14:
         result['errors'].append(f'Messungen über {duration_days} Tage verteilt (max. 14 Tage)')
         return result
     
     # Min. 1 Tag Abstand zwischen Messtagen?
-    for i in range(len(sorted_dates) - 1):
-        gap_days = (sorted_dates[i+1] - sorted_dates[i]).days
+    for i, gap_days in enumerate(np.diff(day_offsets).tolist()):
         if gap_days < 2:  # 2 Tage Differenz = 1 Tag Abstand
             result['errors'].append(f'Abstand Tag {sorted_dates[i]} zu {sorted_dates[i+1]}: {gap_days-1} Tag(e) (benötigt: min. 1)')
     
@@ -604,12 +914,10 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
         return result
     
     # ========== ANFORDERUNG 6: Abstände zwischen Messungen pro Tag ==========
-    for date in sorted_dates:
-        day_measurements = sorted(by_date[date], key=lambda m: m['datetime'])
-        for i in range(len(day_measurements) - 1):
-            time_diff = day_measurements[i+1]['datetime'] - day_measurements[i]['datetime']
-            time_diff_minutes = time_diff.total_seconds() / 60
-            
+    for date, start in zip(sorted_dates, day_starts.tolist()):
+        # Abstände aufeinanderfolgender Messungen in Minuten (Mikrosekunden-Differenzen)
+        day_gaps_minutes = np.diff(measurements.datetimes[start:start + 10]).astype(np.int64) / 1_000_000 / 60
+        for i, time_diff_minutes in enumerate(day_gaps_minutes.tolist()):
             if i == 4:  # Zwischen 5. und 6. Messung
                 if time_diff_minutes < 180:  # 3 Stunden
                     result['warnings'].append(
@@ -623,34 +931,23 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
     
     # Wenn bis hier ok, ist die Basisanforderung erfüllt
     result['valid'] = True
-    print(f"DEBUG: Basisanforderung erfüllt (3 Tage, 10 Messungen/Tag)")
+    log.debug("Basisanforderung erfüllt (3 Tage, 10 Messungen/Tag)")
     
     # ========== MINDERLEISTUNG PRÜFEN ==========
     
-    # Normalerweise verfügbare Geschwindigkeit = Vertragsgeschwindigkeit
-    normal_speed_dl = contract_download
-    normal_speed_ul = contract_upload
-    
-    # 90% der Vertragsgeschwindigkeit
-    threshold_90_pct_dl = contract_download * 0.9
-    threshold_90_pct_ul = contract_upload * 0.9
-    
-    # Minimale Geschwindigkeit = 30% der Vertragsgeschwindigkeit (BNetzA-Standard)
-    min_speed_dl = contract_download * 0.3
-    min_speed_ul = contract_upload * 0.3
+    # Normal = Vertrag, 90 % und Minimum (30 %) je (Download, Upload)
+    normal_speed, threshold_90_pct, min_speed = _bnetza_thresholds(contract_download, contract_upload)
+    log.debug("normal=%s, 90%%=%s, min=%s", normal_speed, threshold_90_pct, min_speed)
     
-    print(f"DEBUG: normal={normal_speed_dl}, 90%={threshold_90_pct_dl}, min={min_speed_dl}")
+    # Ab hier gilt 3 Tage x 10 Messungen: beide Richtungen einmal als (Richtung x Tage x Messungen);
+    # Bedingungen und Statistik werden aus demselben Array berechnet
+    values = np.stack((downloads, uploads)).reshape(2, len(sorted_dates), 10)
+    reached_90, pct_normal, below_min, means, mins, maxs = _bnetza_conditions(
+        values, normal_speed, threshold_90_pct, min_speed,
+    )
     
     # ========== BEDINGUNG 1: 90% an mindestens 2 von 3 Tagen erreicht? ==========
-    days_reached_90_pct_dl = 0
-    days_reached_90_pct_ul = 0
-    
-    for date in sorted_dates:
-        day_measurements = by_date[date]
-        if any(m['download'] >= threshold_90_pct_dl for m in day_measurements):
-            days_reached_90_pct_dl += 1
-        if any(m['upload'] >= threshold_90_pct_ul for m in day_measurements):
-            days_reached_90_pct_ul += 1
+    days_reached_90_pct_dl, days_reached_90_pct_ul = (int(v) for v in reached_90)
     
     condition1_dl_failed = days_reached_90_pct_dl < 2
     condition1_ul_failed = days_reached_90_pct_ul < 2
@@ -662,14 +959,10 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
         'upload': {'reached_days': days_reached_90_pct_ul, 'failed': condition1_ul_failed},
         'failed': condition1_failed
     }
-    print(f"DEBUG: Bedingung 1 - Download {days_reached_90_pct_dl}/3, Upload {days_reached_90_pct_ul}/3")
+    log.debug("Bedingung 1 - Download %d/3, Upload %d/3", days_reached_90_pct_dl, days_reached_90_pct_ul)
     
     # ========== BEDINGUNG 2: 90% der Messungen mit Normalgeschwindigkeit ==========
-    measurements_reaching_normal_dl = sum(1 for m in measurements if m['download'] >= normal_speed_dl)
-    measurements_reaching_normal_ul = sum(1 for m in measurements if m['upload'] >= normal_speed_ul)
-    
-    pct_normal_dl = (measurements_reaching_normal_dl / len(measurements)) * 100
-    pct_normal_ul = (measurements_reaching_normal_ul / len(measurements)) * 100
+    pct_normal_dl, pct_normal_ul = (float(v) for v in pct_normal)
     
     condition2_dl_failed = pct_normal_dl < 90
     condition2_ul_failed = pct_normal_ul < 90
@@ -681,18 +974,10 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
         'upload': {'percentage': pct_normal_ul, 'failed': condition2_ul_failed},
         'failed': condition2_failed
     }
-    print(f"DEBUG: Bedingung 2 - Download {pct_normal_dl:.1f}%, Upload {pct_normal_ul:.1f}%")
+    log.debug("Bedingung 2 - Download %.1f%%, Upload %.1f%%", pct_normal_dl, pct_normal_ul)
     
     # ========== BEDINGUNG 3: Minimale Geschwindigkeit unterschritten an 2+ Tagen ==========
-    days_below_min_dl = 0
-    days_below_min_ul = 0
-    
-    for date in sorted_dates:
-        day_measurements = by_date[date]
-        if any(m['download'] < min_speed_dl for m in day_measurements):
-            days_below_min_dl += 1
-        if any(m['upload'] < min_speed_ul for m in day_measurements):
-            days_below_min_ul += 1
+    days_below_min_dl, days_below_min_ul = (int(v) for v in below_min)
     
     condition3_dl_failed = days_below_min_dl >= 2
     condition3_ul_failed = days_below_min_ul >= 2
@@ -704,46 +989,36 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
         'upload': {'failed_days': days_below_min_ul, 'failed': condition3_ul_failed},
         'failed': condition3_failed
     }
-    print(f"DEBUG: Bedingung 3 - Download {days_below_min_dl}/3 Tage, Upload {days_below_min_ul}/3 Tage")
+    log.debug("Bedingung 3 - Download %d/3 Tage, Upload %d/3 Tage", days_below_min_dl, days_below_min_ul)
     
     # Minderleistung wenn MINDESTENS EINE Bedingung erfüllt
     if condition1_failed or condition2_failed or condition3_failed:
         result['minderleistung'] = True
-        reasons = []
-        
-        if condition1_dl_failed:
-            reasons.append(f'Download: Nur {days_reached_90_pct_dl}/3 Tagen 90% erreicht')
-        if condition1_ul_failed:
-            reasons.append(f'Upload: Nur {days_reached_90_pct_ul}/3 Tagen 90% erreicht')
-        if condition2_dl_failed:
-            reasons.append(f'Download: {pct_normal_dl:.1f}% Messungen mit Normalgeschwindigkeit (benötigt 90%)')
-        if condition2_ul_failed:
-            reasons.append(f'Upload: {pct_normal_ul:.1f}% Messungen mit Normalgeschwindigkeit (benötigt 90%)')
-        if condition3_dl_failed:
-            reasons.append(f'Download: Minimale Geschwindigkeit an {days_below_min_dl} Tagen unterschritten')
-        if condition3_ul_failed:
-            reasons.append(f'Upload: Minimale Geschwindigkeit an {days_below_min_ul} Tagen unterschritten')
-        
-        result['minderleistung_reason'] = ' | '.join(reasons)
-        print(f"DEBUG: MINDERLEISTUNG ERKANNT")
+        reasons = (
+            BNETZA_REASON_90_PCT.format('Download', days_reached_90_pct_dl) if condition1_dl_failed else None,
+            BNETZA_REASON_90_PCT.format('Upload', days_reached_90_pct_ul) if condition1_ul_failed else None,
+            BNETZA_REASON_NORMAL.format('Download', pct_normal_dl) if condition2_dl_failed else None,
+            BNETZA_REASON_NORMAL.format('Upload', pct_normal_ul) if condition2_ul_failed else None,
+            BNETZA_REASON_BELOW_MIN.format('Download', days_below_min_dl) if condition3_dl_failed else None,
+            BNETZA_REASON_BELOW_MIN.format('Upload', days_below_min_ul) if condition3_ul_failed else None,
+        )
+        result['minderleistung_reason'] = ' | '.join(r for r in reasons if r)
+        log.debug("MINDERLEISTUNG ERKANNT")
     else:
         result['minderleistung_reason'] = 'Keine Minderleistung erkannt - alle Anforderungen erfüllt'
-        print(f"DEBUG: KEINE MINDERLEISTUNG")
+        log.debug("KEINE MINDERLEISTUNG")
     
     # Statistiken
-    all_downloads = [m['download'] for m in measurements]
-    all_uploads = [m['upload'] for m in measurements]
-    
     result['stats'] = {
-        'total_measurements': len(measurements),
+        'total_measurements': total,
         'dates': len(sorted_dates),
         'date_range': f'{sorted_dates[0]} bis {sorted_dates[-1]}',
-        'avg_download': sum(all_downloads) / len(all_downloads),
-        'min_download': min(all_downloads),
-        'max_download': max(all_downloads),
-        'avg_upload': sum(all_uploads) / len(all_uploads),
-        'min_upload': min(all_uploads),
-        'max_upload': max(all_uploads),
+        'avg_download': float(means[0]),
+        'min_download': float(mins[0]),
+        'max_download': float(maxs[0]),
+        'avg_upload': float(means[1]),
+        'min_upload': float(mins[1]),
+        'max_upload': float(maxs[1]),
         'contract_download': contract_download,
         'contract_upload': contract_upload,
         'reached_90_pct_days_dl': days_reached_90_pct_dl,
@@ -756,68 +1031,319 @@ def check_bnetza_requirements(measurements: List[Dict], contract_download: float
     
     return result
 
+# Anzahl gemerkter Prüfergebnisse, bevor der Cache geleert wird
+BNETZA_CHECK_CACHE_SIZE = 32
+
+def check_bnetza_requirements(measurements: List[Dict] | MeasurementArrays, contract_download: float, contract_upload: float) -> Dict[str, Any]:
+    """BNetzA-Prüfung (siehe _check_bnetza_requirements) mit Memoisierung je Messungs-Objekt und Vertragswerten.
+    
+    Unveränderte Listen (gleiches Objekt, gleiche Länge) werden nicht erneut geprüft; das Ergebnis
+    wird nur gelesen und daher geteilt. Der Cache wird beim Neuladen der Messungen geleert.
+    """
+    if not measurements:
+        return _check_bnetza_requirements(measurements, contract_download, contract_upload)
+    cache = check_bnetza_requirements._cache
+    key = (id(measurements), len(measurements), contract_download, contract_upload)
+    cached = cache.get(key)
+    # Referenz mitspeichern: hält das Objekt am Leben, damit die id nicht wiederverwendet wird
+    if cached is not None and cached[0] is measurements:
+        return cached[1]
+    result = _check_bnetza_requirements(measurements, contract_download, contract_upload)
+    if len(cache) >= BNETZA_CHECK_CACHE_SIZE:
+        cache.clear()
+    cache[key] = (measurements, result)
+    return result
+
+check_bnetza_requirements._cache = {}
+
+def summarize_measurement_plan(arrays: MeasurementArrays) -> Tuple[str, Dict]:
+    """Diagnose für nicht erfüllbare Messpläne: Top-3 Messtage und Kennzahlen in einem NumPy-Durchlauf.
+    
+    Liefert den Top-3-Text und die Messwert-Statistiken im Format von result['stats'].
+    """
+    days, counts = np.unique(arrays.datetimes.astype('datetime64[D]'), return_counts=True)
+    # Stabil sortieren: bei gleicher Anzahl bleibt der frühere Tag vorne
+    order = np.argsort(-counts, kind='stable')[:3]
+    top3 = ', '.join(f"{d}: {c}" for d, c in zip(days[order].tolist(), counts[order].tolist())) or 'keine'
+    
+    values = np.stack((arrays.download, arrays.upload)) if len(arrays) else np.zeros((2, 1))
+    means, mins, maxs = values.mean(axis=1), values.min(axis=1), values.max(axis=1)
+    stats = {
+        'total_measurements': len(arrays),
+        'dates': len(days),
+        'date_range': f"{days[0]} bis {days[-1]}" if len(days) else 'N/A',
+        'avg_download': float(means[0]),
+        'min_download': float(mins[0]),
+        'max_download': float(maxs[0]),
+        'avg_upload': float(means[1]),
+        'min_upload': float(mins[1]),
+        'max_upload': float(maxs[1]),
+    }
+    return top3, stats
+
 # Helper: Wähle verbraucherfreundliches 30er-Subset (3 Tage x 10 Messungen)
-from itertools import combinations
+# Mindestabstände der Messungen eines Tages in Mikrosekunden
+BNETZA_MIN_GAP_US = 5 * 60 * 1_000_000
+BNETZA_MIN_GAP_5_6_US = 180 * 60 * 1_000_000
+# Bitmaske der Tage 0..14 ab dem ersten Messtag (max. 14 Kalendertage Gesamtdauer)
+BNETZA_SPAN_MASK = (1 << 15) - 1
+
+def _lowest_bit(mask: int) -> int:
+    """Position des niedrigsten gesetzten Bits (mask > 0)."""
+    return (mask & -mask).bit_length() - 1
+
+
+def _select_day_measurements(next_idx: List[int], next_idx_after_5: List[int], start: int, end: int) -> List[int] | None:
+    """Greedy-Auswahl von 10 Messungen eines Tages (Indizes start..end-1) mit den Abstandsregeln.
+    
+    `next_idx[i]` bzw. `next_idx_after_5[i]` ist der erste Index, der mindestens 5 bzw. 180 Minuten
+    nach Messung i liegt; die Greedy-Auswahl ist damit eine Kette von Sprüngen. Geliefert werden
+    die gewählten Indizes oder None, wenn keine 10 Messungen möglich sind.
+    """
+    if end - start < 10:
+        return None
+    picks = [start]
+    i = start
+    for step in range(1, 10):
+        # Zwischen 5. und 6. Messung: >= 180 min, sonst >= 5 min
+        i = next_idx_after_5[i] if step == 5 else next_idx[i]
+        if i >= end:
+            return None
+        picks.append(i)
+    return picks
 
 def select_bnetza_subset(measurements: List[Dict]) -> List[Dict] | None:
     """Wählt ein gültiges Subset von genau 30 Messungen (3 Tage x 10),
     das die BNetzA-Anforderungen (Punkte 4-6) erfüllt. Liefert None, wenn keins gefunden.
+    Erwartet zeitlich aufsteigend sortierte Messungen.
     """
     if not measurements or len(measurements) < 30:
         return None
-    # Gruppieren nach Datum
-    by_date: Dict[datetime.date, List[Dict]] = {}
-    for m in measurements:
-        by_date.setdefault(m['datetime'].date(), []).append(m)
-    all_dates = sorted(by_date.keys())
-    # Versuche alle 3er-Kombinationen von Tagen
-    for d1, d2, d3 in combinations(all_dates, 3):
-        # Max 14 Tage Spanne
-        if (d3 - d1).days > 14:
+    # Zeitpunkte einmal als Mikrosekunden; Tagesgrenzen der sortierten Messungen per np.unique
+    stamps = datetimes_to_datetime64(map(itemgetter('datetime'), measurements), len(measurements))
+    days, starts = np.unique(stamps.astype('datetime64[D]'), return_index=True)
+    ends = np.append(starts[1:], len(measurements))
+    # Nächster zulässiger Nachfolger je Messung für beide Mindestabstände (vektorisiert über alle Tage)
+    times = stamps.view(np.int64)
+    next_idx = np.searchsorted(times, times + BNETZA_MIN_GAP_US, side='left').tolist()
+    next_idx_after_5 = np.searchsorted(times, times + BNETZA_MIN_GAP_5_6_US, side='left').tolist()
+    # Greedy-Auswahl einmal pro Tag; nur Tage mit 10 gültigen Messungen kommen in Frage.
+    # Tage als ganzzahlige Offsets (datetime64[D]); die Filter vergleichen nur noch Ganzzahlen
+    offsets: List[int] = []
+    per_day_picks: List[List[int]] = []
+    for offset, start, end in zip(days.astype(np.int64).tolist(), starts.tolist(), ends.tolist()):
+        picks = _select_day_measurements(next_idx, next_idx_after_5, start, end)
+        if picks is not None:
+            offsets.append(offset)
+            per_day_picks.append(picks)
+    if len(offsets) < 3:
+        return None
+    # Gültige Tage als Bitmaske: Bit n = Tag offsets[0] + n
+    base = offsets[0]
+    valid_days = 0
+    for offset in offsets:
+        valid_days |= 1 << (offset - base)
+    picks_by_offset = dict(zip(offsets, per_day_picks))
+    # Erstes gültiges Tages-Tripel in aufsteigender Reihenfolge (wie itertools.combinations)
+    for o1 in offsets:
+        # Gültige Tage der max. 14-tägigen Spanne ab o1 (Bit n = Tag o1 + n)
+        window = (valid_days >> (o1 - base)) & BNETZA_SPAN_MASK
+        # Frühester zweiter Tag mit mind. 1 Tag Abstand; er lässt dem dritten Tag die meiste Auswahl,
+        # findet sich für ihn kein dritter Tag, dann auch für keinen späteren
+        later = window >> 2
+        if not later:
             continue
-        # Mindestens 1 Tag Abstand zwischen Messtagen (Differenz >= 2)
-        if (d2 - d1).days < 2 or (d3 - d2).days < 2:
+        n2 = 2 + _lowest_bit(later)
+        rest = window >> (n2 + 2)
+        if not rest:
             continue
-        # Für jeden Tag 10 Messungen mit Abständen auswählen
-        selected: List[Dict] = []
-        ok = True
-        for day in [d1, d2, d3]:
-            day_measurements = sorted(by_date[day], key=lambda m: m['datetime'])
-            if len(day_measurements) < 10:
-                ok = False
-                break
-            # Greedy Auswahl mit Abstandsregeln
-            chosen: List[Dict] = []
-            for m in day_measurements:
-                if not chosen:
-                    chosen.append(m)
-                else:
-                    diff_min = (m['datetime'] - chosen[-1]['datetime']).total_seconds() / 60
-                    # Zwischen 5. und 6. Messung: >= 180 min
-                    if len(chosen) == 5:
-                        diff_5_6 = (m['datetime'] - chosen[4]['datetime']).total_seconds() / 60
-                        if diff_min >= 5 and diff_5_6 >= 180:
-                            chosen.append(m)
-                    else:
-                        if diff_min >= 5:
-                            chosen.append(m)
-                if len(chosen) == 10:
-                    break
-            if len(chosen) != 10:
-                ok = False
-                break
-            selected.extend(chosen)
-        if ok and len(selected) == 30:
-            return selected
+        n3 = n2 + 2 + _lowest_bit(rest)
+        return [
+            measurements[idx]
+            for offset in (o1, o1 + n2, o1 + n3)
+            for idx in picks_by_offset[offset]
+        ]
     return None
 
+def slice_key(measurements: List[Dict]) -> tuple:
+    """Schlüssel eines nicht leeren Ausschnitts von all_measurements: (Anzahl, erster, letzter Zeitpunkt).
+    
+    Ausschnitte sind zusammenhängend und werden dadurch eindeutig bestimmt; der Schlüssel gilt
+    nur für den aktuell geladenen Bestand (Caches damit werden beim Neuladen geleert).
+    """
+    return (len(measurements), measurements[0]['datetime'], measurements[-1]['datetime'])
+
+# Gewählte Subsets je Zeitfenster des geladenen Bestands: slice_key -> Subset
+_subset_cache: Dict[tuple, Optional[List[Dict]]] = {}
+
+async def bnetza_subset_for(measurements: List[Dict]) -> Optional[List[Dict]]:
+    """Subset für einen Ausschnitt von all_measurements; wiederholte Prüfungen überspringen die Suche."""
+    key = slice_key(measurements)
+    if key not in _subset_cache:
+        if len(_subset_cache) >= BNETZA_CHECK_CACHE_SIZE:
+            _subset_cache.clear()
+        # Im Thread, damit die UI nicht blockiert
+        _subset_cache[key] = await asyncio.to_thread(select_bnetza_subset, measurements)
+    return _subset_cache[key]
+
+def build_bnetza_report(measurements: List[Dict], contract_download: float, contract_upload: float,
+                        generated_at: Optional[datetime] = None) -> io.BytesIO:
+    """BNetzA-Prüfung der Messungen samt PDF-Bericht (läuft im Thread der PDF-Erzeugung)."""
+    result = check_bnetza_requirements(measurements, contract_download, contract_upload)
+    log.debug("check completed -> valid=%s, errors=%d, warnings=%d",
+              result.get('valid'), len(result.get('errors', [])), len(result.get('warnings', [])))
+    return generate_bnetza_pdf(result, contract_download, contract_upload, report_rows(measurements),
+                               generated_at=generated_at)
+
+def build_bnetza_plan_report(measurements: List[Dict], contract_download: float, contract_upload: float,
+                             generated_at: Optional[datetime] = None) -> io.BytesIO:
+    """Bericht ohne gültiges 30er-Subset: Messplan-Diagnose statt Prüfung (läuft im
+    Thread der PDF-Erzeugung)."""
+    # Diagnose: Top-3 Tage mit Messungsanzahl und Kennzahlen direkt auf den Spalten
+    top3, plan_stats = summarize_measurement_plan(timeframe_arrays(all_arrays, measurements))
+    result = {
+        'valid': False,
+        'errors': [
+            'Es konnten keine 30 Messungen auf 3 Kalendertage (je 10) innerhalb von 14 Tagen mit geforderten Abständen gebildet werden.',
+            f'Top-Tage (Anzahl Messungen): {top3}',
+        ],
+        'warnings': [],
+        'minderleistung': False,
+        'minderleistung_details': {},
+        'minderleistung_reason': 'Prüfung nicht möglich: Mindestanforderungen an Messplan nicht erfüllt',
+        'stats': {
+            **plan_stats,
+            'contract_download': float(contract_download),
+            'contract_upload': float(contract_upload),
+            'reached_90_pct_days_dl': 0,
+            'reached_90_pct_days_ul': 0,
+            'below_min_days_dl': 0,
+            'below_min_days_ul': 0,
+            'percentage_normal_dl': 0.0,
+            'percentage_normal_ul': 0.0,
+        },
+    }
+    return generate_bnetza_pdf(result, contract_download, contract_upload, report_rows(measurements),
+                               generated_at=generated_at)
+
+# ============================================================================
+# DOWNLOADS
+# ============================================================================
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+def _iter_buffer(buffer: io.BytesIO):
+    """Liest einen Puffer blockweise, ohne seinen Inhalt als Ganzes zu kopieren."""
+    buffer.seek(0)
+    while chunk := buffer.read(DOWNLOAD_CHUNK_SIZE):
+        yield chunk
+
+class _EchoWriter:
+    """Datei-Ersatz für csv.writer: gibt jede formatierte Zeile zurück, statt sie zu puffern."""
+    def write(self, value: str) -> str:
+        return value
+
+def iter_csv(header: List[str], rows) -> Iterator[bytes]:
+    """Erzeugt eine CSV-Datei blockweise (UTF-8) aus Kopfzeile und Zeilen-Iterator.
+    
+    Zeilen werden einzeln formatiert und zu Blöcken von etwa DOWNLOAD_CHUNK_SIZE Bytes gesammelt.
+    """
+    writer = csv.writer(_EchoWriter())
+    lines = [writer.writerow(header)]
+    size = len(lines[0])
+    for row in rows:
+        line = writer.writerow(row)
+        lines.append(line)
+        size += len(line)
+        if size >= DOWNLOAD_CHUNK_SIZE:
+            yield ''.join(lines).encode('utf-8')
+            lines, size = [], 0
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+
+def download_stream(content, filename: str, media_type: str) -> None:
+    """Startet einen Download über eine einmalig gültige HTTP-Route.
+    
+    Der Inhalt (BytesIO oder Iterator über Blöcke) wird per StreamingResponse gesendet, statt als
+    komplettes bytes-Objekt über den WebSocket zu gehen. Wird die URL nie abgerufen (Tab geschlossen,
+    Download abgebrochen), entfernt sich die Route mit dem Client.
+    """
+    chunks = _iter_buffer(content) if isinstance(content, io.BytesIO) else content
+    path = f'/download/{secrets.token_urlsafe(16)}/{filename}'
+    
+    @app.get(path)
+    def _serve_download() -> StreamingResponse:
+        app.remove_route(path)
+        return StreamingResponse(
+            chunks,
+            media_type=media_type,
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+        )
+    
+    # Bereits abgerufene Routen sind schon entfernt; remove_route ignoriert fehlende Pfade
+    ui.context.client.on_delete(lambda: app.remove_route(path))
+    ui.download.from_url(urllib.parse.quote(path), filename, media_type)
+
+# ============================================================================
+# GRID-DATENQUELLE (Infinite Row Model)
+# ============================================================================
+GRID_BLOCK_SIZE = 100
+# Felder, die der Browser braucht: Anzeige und Zeilen-ID; Rohwerte bleiben für Sortierung/Filter am Server.
+# Blöcke werden spaltenweise in dieser Reihenfolge übertragen (Feldnamen nicht je Zeile)
+GRID_TRANSPORT_FIELDS = ('datetime_display', 'download_display', 'upload_display', 'ping_display', 'os', 'browser', 'idx')
+# Wartezeit, in der aufeinanderfolgende Auswahländerungen zusammengefasst werden
+SELECTION_DEBOUNCE_MS = 150
+
+def register_grid_datasource(get_measurements) -> str:
+    """Registriert die Zeilen-Route des Grids für den aktuellen Client und liefert die JS-Datenquelle.
+    
+    Das Grid fordert Blöcke (startRow/endRow) samt Sortier- und Filtermodell an; die Route
+    liefert nur diesen Ausschnitt. Das sortierte/gefilterte Ergebnis wird bis zur nächsten
+    Änderung von Messungen oder Modell wiederverwendet. Die Route wird mit dem Client entfernt.
+    `get_measurements` liefert das angezeigte Zeitfenster von all_measurements.
+    """
+    path = f'/api/rows/{secrets.token_urlsafe(16)}'
+    view = {'key': None, 'rows': []}
+    
+    # Anfrage, Cache-Schlüssel und Antwort über NiceGUIs JSON-Modul (orjson, falls installiert)
+    # statt über FastAPIs jsonable_encoder + stdlib-json
+    @app.post(path, response_class=NiceGUIJSONResponse)
+    async def _grid_rows_block(request: Request) -> NiceGUIJSONResponse:
+        params = json_loads(await request.body())
+        measurements = get_measurements()
+        key = (id(measurements), len(measurements),
+               json_dumps([params.get('sortModel'), params.get('filterModel')], sort_keys=True))
+        if view['key'] != key:
+            view['rows'] = query_grid_rows(timeframe_grid_rows(measurements), params.get('sortModel'), params.get('filterModel'))
+            view['key'] = key
+        start = max(0, int(params.get('startRow', 0)))
+        end = max(start, int(params.get('endRow', start + GRID_BLOCK_SIZE)))
+        block = view['rows'][start:end]
+        columns = [[row[field] for row in block] for field in GRID_TRANSPORT_FIELDS]
+        return NiceGUIJSONResponse({'columns': columns, 'rowCount': len(view['rows'])})
+    
+    ui.context.client.on_delete(lambda: app.remove_route(path))
+    return (
+        '{getRows: params => fetch(' + json.dumps(path) + ', {method: "POST", headers: {"Content-Type": "application/json"}, '
+        'body: JSON.stringify({startRow: params.startRow, endRow: params.endRow, sortModel: params.sortModel, filterModel: params.filterModel})})'
+        '.then(response => response.json())'
+        '.then(data => params.successCallback(data.columns[0].map((_, i) => Object.fromEntries('
+        + json.dumps(GRID_TRANSPORT_FIELDS) + '.map((field, j) => [field, data.columns[j][i]]))), data.rowCount))'
+        '.catch(() => params.failCallback())}'
+    )
+
 # ============================================================================
 # DATEN LADEN
 # ============================================================================
-all_measurements = load_measurements()
-stats_all = calculate_statistics(all_measurements)
+# Zeitlich sortiert (siehe load_measurements); alle Ausschnitte behalten diese Ordnung
+# all_arrays: spaltenweise Sicht auf den Gesamtbestand; Position = 'idx' der Messungen bzw. Grid-Zeilen
+all_measurements, all_arrays = load_measurements_with_arrays()
+# Grid-Zeilen des Gesamtbestands (Position = 'idx'); Zeitfenster sind Ausschnitte davon
+all_grid_rows = grid_rows(all_measurements)
+stats_all = calculate_array_statistics(all_arrays)
+# Zeilen der Statistik-Tabelle (Gesamt-Spalte einmal formatiert, Auswahl wird je Ereignis gesetzt)
+stats_rows = build_stats_rows(stats_all)
 # aktuell im Plot anzuzeigende Messungen (Zeitfilter/Selektion)
-current_plot_measurements: List[Dict] = all_measurements
+current_plot_arrays: MeasurementArrays = all_arrays
 
 # ============================================================================
 # UI AUFBAU
@@ -856,67 +1382,85 @@ with ui.row().classes('w-full gap-4 p-4'):
                 else filter_measurements_by_timeframe(all_measurements, int(_initial_selected))
             )
 
-            grid_data = [
-                {
-                    'datetime': m['datetime'].isoformat(),
-                    'download': m['download'],
-                    'upload': m['upload'],
-                    'ping': m['ping'],
-                    'os': m['os'],
-                    'browser': m['browser'],
-                }
-                for m in _initial_measurements
-            ]
+            # Das Grid lädt Zeilen blockweise vom Server (sortiert/gefiltert wird dort)
+            grid_measurements = _initial_measurements
+            grid_datasource = register_grid_datasource(lambda: grid_measurements)
             
             grid = ui.aggrid({
                 'columnDefs': [
-                    {'headerName': 'Datum/Uhrzeit', 'field': 'datetime', 'filter': 'agTextColumnFilter', 'sort': 'desc', ':valueFormatter': 'params => params.value ? new Date(params.value).toLocaleDateString("de-DE") + " " + new Date(params.value).toLocaleTimeString("de-DE") : ""'},
-                    {'headerName': 'Download (Mbit/s)', 'field': 'download', 'filter': 'agNumberColumnFilter', 'sortable': True, ':valueFormatter': 'params => params.value ? params.value.toFixed(2) : ""'},
-                    {'headerName': 'Upload (Mbit/s)', 'field': 'upload', 'filter': 'agNumberColumnFilter', 'sortable': True, ':valueFormatter': 'params => params.value ? params.value.toFixed(2) : ""'},
-                    {'headerName': 'Ping (ms)', 'field': 'ping', 'filter': 'agNumberColumnFilter', 'sortable': True, ':valueFormatter': 'params => params.value ? params.value.toFixed(0) : ""'},
+                    {'headerName': 'Datum/Uhrzeit', 'field': 'datetime_display', 'colId': 'datetime', 'filter': 'agTextColumnFilter', 'sort': 'desc'},
+                    {'headerName': 'Download (Mbit/s)', 'field': 'download_display', 'colId': 'download', 'filter': 'agNumberColumnFilter', 'sortable': True},
+                    {'headerName': 'Upload (Mbit/s)', 'field': 'upload_display', 'colId': 'upload', 'filter': 'agNumberColumnFilter', 'sortable': True},
+                    {'headerName': 'Ping (ms)', 'field': 'ping_display', 'colId': 'ping', 'filter': 'agNumberColumnFilter', 'sortable': True},
                     {'headerName': 'Betriebssystem', 'field': 'os', 'filter': 'agTextColumnFilter'},
                     {'headerName': 'Browser', 'field': 'browser', 'filter': 'agTextColumnFilter'},
                 ],
-                'rowData': grid_data,
-                'rowSelection': {'mode': 'multiRow'},
+                'rowModelType': 'infinite',
+                ':datasource': grid_datasource,
+                ':getRowId': 'params => String(params.data.idx)',
+                'cacheBlockSize': GRID_BLOCK_SIZE,
+                # "Alle auswählen" wird vom Infinite Row Model nicht unterstützt
+                'rowSelection': {'mode': 'multiRow', 'headerCheckbox': False},
                 'pagination': {'pageSize': 20},
                 'paginationPageSize': 20,
                 'domLayout': 'normal'
             }).classes('w-full h-[72vh]')
             
+            def show_in_grid(measurements: List[Dict]) -> None:
+                """Setzt die Messungen des Grids; das Grid lädt nur bei geänderten Zeilen neu.
+                
+                Statt das Zeilenmodell zu verwerfen, werden die geladenen Blöcke an Ort und Stelle
+                neu angefordert (Scrollposition und Auswahl bleiben erhalten). Zeitausschnitte sind
+                zusammenhängend, gleiche Länge und gleiche Randmessungen bedeuten daher gleiche Zeilen.
+                """
+                global grid_measurements
+                unchanged = len(measurements) == len(grid_measurements) and (
+                    not measurements
+                    or (measurements[0] is grid_measurements[0] and measurements[-1] is grid_measurements[-1])
+                )
+                grid_measurements = measurements
+                if not unchanged:
+                    grid.run_grid_method('refreshInfiniteCache')
+            
+            # Serverseitiger Spiegel der Grid-Auswahl ('idx' der Zeilen = Zeilen-ID); rowSelected liefert
+            # je Zeile nur ID und Status, die Auswahl muss daher nie vom Browser abgefragt werden
+            selected_indices: set = set()
+            
+            def on_row_selected(e):
+                if e.args['selected']:
+                    selected_indices.add(int(e.args['rowId']))
+                else:
+                    selected_indices.discard(int(e.args['rowId']))
+            
+            grid.on('rowSelected', on_row_selected, args=['rowId', 'selected'])
+            
+            def selected_measurements() -> List[Dict]:
+                """Ausgewählte Messungen in Zeitreihenfolge."""
+                return [all_measurements[i] for i in sorted(selected_indices) if i < len(all_measurements)]
+            
             # Export-Buttons (unten, mit Abstand)
             async def export_pdf():
-                selected_rows = await grid.get_selected_rows()
-                if not selected_rows:
+                selected = selected_measurements()
+                if not selected:
                     ui.notify('Keine Zeilen ausgewählt')
                     return
                 
                 notif = ui.notification('PDF wird generiert...', type='ongoing', spinner=True, timeout=None)
                 try:
-                    # Felder für Markdown vorbereiten
-                    rows_with_names = []
-                    for row in selected_rows:
-                        rows_with_names.append({
-                            'Datum/Uhrzeit': row['datetime'],
-                            'Download (Mbit/s)': row['download'],
-                            'Upload (Mbit/s)': row['upload'],
-                            'Ping (ms)': row['ping'],
-                            'Betriebssystem': row['os'],
-                            'Internet-Browser': row['browser'],
-                        })
+                    # Felder für den PDF-Export vorbereiten
+                    rows_with_names = report_rows(selected)
                     
                     notif.message = 'Konvertiere zu PDF...'
-                    markdown_content = export_to_markdown(rows_with_names)
-                    pdf_bytes = markdown_to_pdf(markdown_content, rows_with_names)
-                    ui.download(pdf_bytes, f'messdaten_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf')
+                    # Im Thread erzeugt, damit der Event-Loop frei bleibt
+                    exported_at = datetime.now().replace(microsecond=0)
+                    pdf_buffer = await asyncio.to_thread(build_export_pdf, rows_with_names, exported_at)
+                    download_stream(pdf_buffer, f'messdaten_export_{exported_at.strftime("%Y%m%d_%H%M%S")}.pdf', 'application/pdf')
                     notif.message = '✓ PDF exportiert'
                     notif.type = 'positive'
                 except Exception as e:
                     notif.message = f'Fehler beim PDF-Export: {str(e)}'
                     notif.type = 'negative'
-                    print(f"DEBUG: Error in export_pdf: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    log.exception("Error in export_pdf")
                 finally:
                     try:
                         notif.dismiss()
@@ -927,38 +1471,26 @@ with ui.row().classes('w-full gap-4 p-4'):
                             pass
             
             async def export_csv():
-                selected_rows = await grid.get_selected_rows()
-                if not selected_rows:
+                selected = selected_measurements()
+                if not selected:
                     ui.notify('Keine Zeilen ausgewählt')
                     return
                 
                 notif = ui.notification('CSV wird generiert...', type='ongoing', spinner=True, timeout=None)
                 try:
-                    output = io.StringIO()
-                    fieldnames = ['Datum/Uhrzeit', 'Download (Mbit/s)', 'Upload (Mbit/s)', 'Ping (ms)', 'Betriebssystem', 'Browser']
-                    writer = csv.DictWriter(output, fieldnames=fieldnames)
-                    writer.writeheader()
-                    
-                    for row in selected_rows:
-                        writer.writerow({
-                            'Datum/Uhrzeit': row['datetime'],
-                            'Download (Mbit/s)': row['download'],
-                            'Upload (Mbit/s)': row['upload'],
-                            'Ping (ms)': row['ping'],
-                            'Betriebssystem': row['os'],
-                            'Browser': row['browser'],
-                        })
-                    
-                    csv_content = output.getvalue()
-                    ui.download(csv_content.encode('utf-8'), f'messdaten_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+                    # CSV wird beim Download zeilenweise erzeugt statt vorab komplett im Speicher
+                    header = ['Datum/Uhrzeit', 'Download (Mbit/s)', 'Upload (Mbit/s)', 'Ping (ms)', 'Betriebssystem', 'Browser']
+                    csv_rows = (
+                        (row['datetime'], row['download'], row['upload'], row['ping'], row['os'], row['browser'])
+                        for row in grid_rows(selected)
+                    )
+                    download_stream(iter_csv(header, csv_rows), f'messdaten_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv', 'text/csv')
                     notif.message = '✓ CSV exportiert'
                     notif.type = 'positive'
                 except Exception as e:
                     notif.message = f'Fehler beim CSV-Export: {str(e)}'
                     notif.type = 'negative'
-                    print(f"DEBUG: Error in export_csv: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    log.exception("Error in export_csv")
                 finally:
                     try:
                         notif.dismiss()
@@ -972,7 +1504,14 @@ with ui.row().classes('w-full gap-4 p-4'):
                 global all_measurements
                 notif = ui.notification('Lade Messungen...', type='ongoing', spinner=True, timeout=None)
                 try:
-                    all_measurements = load_measurements()
+                    global all_arrays
+                    all_measurements, all_arrays = load_measurements_with_arrays()
+                    check_bnetza_requirements._cache.clear()
+                    _subset_cache.clear()
+                    timeframe_statistics.cache_clear()
+                    clear_row_caches()
+                    global all_grid_rows
+                    all_grid_rows = grid_rows(all_measurements)
                     notif.message = f'Verarbeite {len(all_measurements)} Messungen...'
                     
                     # Grid aktualisieren (unter Berücksichtigung des aktuellen Zeitfilters)
@@ -980,50 +1519,29 @@ with ui.row().classes('w-full gap-4 p-4'):
                     filtered_after_reload = (
                         all_measurements if sel == 'all' else filter_measurements_by_timeframe(all_measurements, int(sel))
                     )
-                    new_grid_data = [
-                        {
-                            'datetime': m['datetime'].isoformat(),
-                            'download': m['download'],
-                            'upload': m['upload'],
-                            'ping': m['ping'],
-                            'os': m['os'],
-                            'browser': m['browser'],
-                        }
-                        for m in filtered_after_reload
-                    ]
-                    grid.options['rowData'] = new_grid_data
-                    grid.update()
+                    # Zeilen-IDs ('idx') gelten nur für den vorherigen Bestand -> Auswahl aufheben
+                    grid.run_grid_method('deselectAll')
+                    selected_indices.clear()
+                    show_in_grid(filtered_after_reload)
                     
                     # Statistiken aktualisieren
                     global stats_all
-                    stats_all = calculate_statistics(all_measurements)
-                    new_stats_rows = [
-                        {'metric': 'Anzahl Messungen', 'gesamt': stats_all['count'], 'auswahl': '-'},
-                        {'metric': 'Ø Download (Mbit/s)', 'gesamt': f"{stats_all['avg_download']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Min Download', 'gesamt': f"{stats_all['min_download']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Max Download', 'gesamt': f"{stats_all['max_download']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Ø Upload (Mbit/s)', 'gesamt': f"{stats_all['avg_upload']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Min Upload', 'gesamt': f"{stats_all['min_upload']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Max Upload', 'gesamt': f"{stats_all['max_upload']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Ø Ping (ms)', 'gesamt': f"{stats_all['avg_ping']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Min Ping', 'gesamt': f"{stats_all['min_ping']:.2f}", 'auswahl': '-'},
-                        {'metric': 'Max Ping', 'gesamt': f"{stats_all['max_ping']:.2f}", 'auswahl': '-'},
-                    ]
-                    stats_table.rows = new_stats_rows
-                    stats_table.update()
+                    stats_all = calculate_array_statistics(all_arrays)
+                    # Gesamt-Spalte neu aufbauen, Auswahl zurücksetzen
+                    global stats_rows
+                    stats_rows = build_stats_rows(stats_all)
+                    stats_table.rows = stats_rows
                     
                     notif.message = 'Plot wird aktualisiert...'
                     # Plot und globalen Zustand auf den gefilterten Bestand setzen
-                    update_line_plot_data(filtered_after_reload)
+                    update_line_plot_data(timeframe_arrays(all_arrays, filtered_after_reload))
                     
                     notif.message = f'✓ {len(all_measurements)} Messungen geladen'
                     notif.type = 'positive'
                 except Exception as e:
                     notif.message = f'Fehler beim Laden: {str(e)}'
                     notif.type = 'negative'
-                    print(f"DEBUG: Error in reload_data: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    log.exception("Error in reload_data")
                 finally:
                     try:
                         notif.dismiss()
@@ -1036,7 +1554,7 @@ with ui.row().classes('w-full gap-4 p-4'):
             # BNetzA Checker Button
             async def check_bnetza():
                 """BNetzA Checker - Verwendet automatisch ALLE Messdaten."""
-                print(f"DEBUG: BNetzA Check gestartet mit {len(all_measurements)} Messungen")
+                log.debug("BNetzA Check gestartet mit %d Messungen", len(all_measurements))
                 
                 if len(all_measurements) < 30:
                     ui.notify(f'Zu wenig Messungen ({len(all_measurements)}/30 benötigt)', type='negative')
@@ -1069,8 +1587,7 @@ with ui.row().classes('w-full gap-4 p-4'):
                             """Starte die BNetzA-Prüfung."""
                             notif = ui.notification('Prüfe BNetzA-Anforderungen...', type='ongoing', spinner=True, timeout=None)
                             try:
-                                import asyncio
-                                print("DEBUG: run_check entered")
+                                log.debug("run_check entered")
                                 # kurzen Yield, damit die Notification sichtbar wird
                                 await asyncio.sleep(0)
                                 # Zeitraumfilter anwenden
@@ -1078,10 +1595,9 @@ with ui.row().classes('w-full gap-4 p-4'):
                                 if timeframe_select.value != 'all':
                                     try:
                                         days = int(timeframe_select.value)
-                                        cutoff = datetime.now() - timedelta(days=days)
-                                        base_measurements = [m for m in all_measurements if m['datetime'] >= cutoff]
+                                        base_measurements = filter_measurements_by_timeframe(all_measurements, days)
                                         notif.message = f"Zeitraum: letzte {days} Tage ({len(base_measurements)} Messungen)"
-                                        print(f"DEBUG: timeframe={days} days -> base_measurements={len(base_measurements)}")
+                                        log.debug("timeframe=%d days -> base_measurements=%d", days, len(base_measurements))
                                     except Exception:
                                         pass
                                 
@@ -1090,141 +1606,73 @@ with ui.row().classes('w-full gap-4 p-4'):
                                     notif.type = 'negative'
                                     notif.spinner = False
                                     notif.timeout = 5.0
-                                    print("DEBUG: abort because <30 measurements after timeframe filter")
+                                    log.debug("abort because <30 measurements after timeframe filter")
                                     return
                                 
-                                # Verbraucherfreundlich: wähle gültiges 30er-Subset, falls möglich (im Thread, damit UI nicht blockiert)
-                                print("DEBUG: selecting subset...")
-                                subset = await asyncio.to_thread(select_bnetza_subset, base_measurements)
+                                generated_at = datetime.now().replace(microsecond=0)
+                                
+                                # Verbraucherfreundlich: wähle gültiges 30er-Subset, falls möglich (gleiches Subset-Objekt
+                                # bei wiederholter Prüfung -> auch das Prüfergebnis kommt aus dem Cache)
+                                log.debug("selecting subset...")
+                                subset = await bnetza_subset_for(base_measurements)
                                 if subset:
                                     used_measurements = subset
                                     notif.message = 'Gültiges 30er-Subset gewählt (3 Tage x 10)'
-                                    print("DEBUG: subset selected with 30 measurements")
+                                    log.debug("subset selected with 30 measurements")
                                 else:
                                     # Kein gültiges 30er-Subset gefunden: Verbraucherfreundliche Fehlermeldung vorbereiten
-                                    print(f"DEBUG: no subset -> cannot form required 3x10 within 14 days; base={len(base_measurements)}")
-                                    # Diagnose: Top-3 Tage mit Messungsanzahl
-                                    from collections import defaultdict as _dd
-                                    _by_date = _dd(list)
-                                    for m in base_measurements:
-                                        _by_date[m['datetime'].date()].append(m)
-                                    _counts = sorted(((d, len(v)) for d, v in _by_date.items()), key=lambda x: x[1], reverse=True)
-                                    top3 = ', '.join([f"{d}: {c}" for d, c in _counts[:3]]) if _counts else 'keine'
-                                    result = {
-                                        'valid': False,
-                                        'errors': [
-                                            'Es konnten keine 30 Messungen auf 3 Kalendertage (je 10) innerhalb von 14 Tagen mit geforderten Abständen gebildet werden.',
-                                            f'Top-Tage (Anzahl Messungen): {top3}',
-                                        ],
-                                        'warnings': [],
-                                        'minderleistung': False,
-                                        'minderleistung_details': {},
-                                        'minderleistung_reason': 'Prüfung nicht möglich: Mindestanforderungen an Messplan nicht erfüllt',
-                                        'stats': {
-                                            'total_measurements': len(base_measurements),
-                                            'dates': len(_by_date),
-                                            'date_range': f"{min(_by_date.keys())} bis {max(_by_date.keys())}" if _by_date else 'N/A',
-                                            'avg_download': sum(m['download'] for m in base_measurements)/len(base_measurements) if base_measurements else 0.0,
-                                            'min_download': min((m['download'] for m in base_measurements), default=0.0),
-                                            'max_download': max((m['download'] for m in base_measurements), default=0.0),
-                                            'avg_upload': sum(m['upload'] for m in base_measurements)/len(base_measurements) if base_measurements else 0.0,
-                                            'min_upload': min((m['upload'] for m in base_measurements), default=0.0),
-                                            'max_upload': max((m['upload'] for m in base_measurements), default=0.0),
-                                            'contract_download': float(contract_dl.value),
-                                            'contract_upload': float(contract_ul.value),
-                                            'reached_90_pct_days_dl': 0,
-                                            'reached_90_pct_days_ul': 0,
-                                            'below_min_days_dl': 0,
-                                            'below_min_days_ul': 0,
-                                            'percentage_normal_dl': 0.0,
-                                            'percentage_normal_ul': 0.0,
-                                        },
-                                    }
+                                    log.debug("no subset -> cannot form required 3x10 within 14 days; base=%d", len(base_measurements))
                                     notif.message = 'Prüfung nicht möglich: Mindestanforderungen (3 Tage × 10) nicht erfüllbar'
                                     notif.type = 'warning'
                                     notif.spinner = False
                                     notif.dismiss()
-                                    print("DEBUG: generating PDF with failure explanation instead of running check...")
+                                    log.debug("generating PDF with failure explanation instead of running check...")
                                     # Dialog schließen und direkt PDF erzeugen
                                     dialog.close()
                                     try:
-                                        # Gemessene Daten für PDF aufbereiten
-                                        pdf_rows = [
-                                            {
-                                                'Datum/Uhrzeit': m['datetime'].isoformat(),
-                                                'Download (Mbit/s)': m['download'],
-                                                'Upload (Mbit/s)': m['upload'],
-                                                'Ping (ms)': m['ping'],
-                                                'Betriebssystem': m['os'],
-                                                'Internet-Browser': m['browser'],
-                                            }
-                                            for m in base_measurements
-                                        ]
-                                        pdf_bytes = generate_bnetza_pdf(
-                                            result,
+                                        # Diagnose, Messdaten und PDF im Thread
+                                        pdf_buffer = await asyncio.to_thread(
+                                            build_bnetza_plan_report,
+                                            base_measurements,
                                             float(contract_dl.value),
                                             float(contract_ul.value),
-                                            pdf_rows
+                                            generated_at,
                                         )
-                                        ui.download(pdf_bytes, f'bnetza_bericht_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf')
+                                        download_stream(pdf_buffer, f'bnetza_bericht_{generated_at.strftime("%Y%m%d_%H%M%S")}.pdf', 'application/pdf')
                                         ui.notification('BNetzA PDF exportiert (Prüfung nicht möglich)', type='warning')
                                     except Exception as e:
-                                        import traceback as _tb
-                                        print(f"DEBUG: Error during PDF generation (no-subset): {e}")
-                                        _tb.print_exc()
+                                        log.exception("Error during PDF generation (no-subset)")
                                         ui.notification(f'Fehler beim PDF-Export: {e}', type='negative')
                                     return
                                 
-                                # Hauptprüfung im Thread ausführen
-                                print("DEBUG: calling check_bnetza_requirements...")
-                                result = await asyncio.to_thread(
-                                    check_bnetza_requirements,
+                                # Hauptprüfung und Bericht im Thread; das Prüfergebnis kommt bei gleichem Subset aus dem Cache
+                                log.debug("calling check_bnetza_requirements...")
+                                pdf_buffer = await asyncio.to_thread(
+                                    build_bnetza_report,
                                     used_measurements,
                                     float(contract_dl.value),
                                     float(contract_ul.value),
+                                    generated_at,
                                 )
-                                print(f"DEBUG: check completed -> valid={result.get('valid')}, errors={len(result.get('errors', []))}, warnings={len(result.get('warnings', []))}")
                                 notif.message = '✓ Prüfung abgeschlossen, Ergebnisse werden angezeigt...'
                                 notif.type = 'positive'
                                 notif.spinner = False
                                 notif.dismiss()
                             except Exception as e:
-                                print(f"DEBUG: Error in check_bnetza_requirements: {e}")
-                                import traceback
-                                traceback.print_exc()
+                                log.exception("Error in check_bnetza_requirements")
                                 notif.message = f'Fehler: {str(e)}'
                                 notif.type = 'negative'
                                 notif.spinner = False
                                 notif.timeout = 6.0
                                 return
                             
-                            print("DEBUG: generating PDF instead of opening result dialog...")
+                            log.debug("downloading PDF instead of opening result dialog...")
                             try:
-                                # Gemessene Daten für PDF aufbereiten (verwendete Daten)
-                                pdf_rows = [
-                                    {
-                                        'Datum/Uhrzeit': m['datetime'].isoformat(),
-                                        'Download (Mbit/s)': m['download'],
-                                        'Upload (Mbit/s)': m['upload'],
-                                        'Ping (ms)': m['ping'],
-                                        'Betriebssystem': m['os'],
-                                        'Internet-Browser': m['browser'],
-                                    }
-                                    for m in used_measurements
-                                ]
-                                pdf_bytes = generate_bnetza_pdf(
-                                    result,
-                                    float(contract_dl.value),
-                                    float(contract_ul.value),
-                                    pdf_rows
-                                )
-                                ui.download(pdf_bytes, f'bnetza_bericht_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf')
+                                download_stream(pdf_buffer, f'bnetza_bericht_{generated_at.strftime("%Y%m%d_%H%M%S")}.pdf', 'application/pdf')
                                 ui.notification('BNetzA PDF exportiert', type='positive')
-                                print("DEBUG: PDF download triggered")
+                                log.debug("PDF download triggered")
                             except Exception as e:
-                                print(f"DEBUG: Error during PDF generation: {e}")
-                                import traceback as _tb
-                                _tb.print_exc()
+                                log.exception("Error during PDF generation")
                                 ui.notification(f'Fehler beim PDF-Export: {e}', type='negative')
                 
                         # Aktionen im Eingabe-Dialog
@@ -1245,61 +1693,39 @@ with ui.row().classes('w-full gap-4 p-4'):
             
             
             # Helper-Funktion für Stats-Tabelle UND Plot Updates
-            def update_stats_and_plot(selected_rows: List[Dict] = None):
-                """Aktualisiert die Statistik-Tabelle und den Plot basierend auf Auswahl."""
-                if selected_rows:
-                    downloads = [float(r['download']) for r in selected_rows]
-                    uploads = [float(r['upload']) for r in selected_rows]
-                    pings = [float(r['ping']) for r in selected_rows]
-                    auswahl = {
-                        'count': len(selected_rows),
-                        'avg_download': sum(downloads)/len(downloads),
-                        'min_download': min(downloads),
-                        'max_download': max(downloads),
-                        'avg_upload': sum(uploads)/len(uploads),
-                        'min_upload': min(uploads),
-                        'max_upload': max(uploads),
-                        'avg_ping': sum(pings)/len(pings),
-                        'min_ping': min(pings),
-                        'max_ping': max(pings),
-                    }
-                    
-                    # Konvertiere Grid-Daten zurück zu Measurement-Format
-                    plot_measurements = [
-                        {
-                            'datetime': datetime.fromisoformat(r['datetime']),
-                            'download': r['download'],
-                            'upload': r['upload'],
-                            'ping': r['ping'],
-                        }
-                        for r in selected_rows
-                    ]
+            def update_stats_and_plot(selected: set = None):
+                """Aktualisiert die Statistik-Tabelle und den Plot basierend auf Auswahl ('idx' der Zeilen)."""
+                if selected:
+                    # Auswahl über den Index der Grid-Zeilen direkt auf den Arrays auswerten
+                    indices = np.fromiter(selected, dtype=np.intp, count=len(selected))
+                    indices = np.sort(indices[indices < len(all_arrays)])
+                    auswahl = calculate_array_statistics(all_arrays, indices)
+                    # Spalten der Auswahl in Zeitreihenfolge (Index = Zeitordnung)
+                    plot_arrays = all_arrays[indices]
                 else:
-                    auswahl = {k: None for k in stats_all.keys()}
-                    plot_measurements = None
+                    auswahl = None
+                    plot_arrays = None
                 
-                new_stats_rows = [
-                    {'metric': 'Anzahl Messungen', 'gesamt': stats_all['count'], 'auswahl': auswahl['count'] if auswahl['count'] is not None else '-'},
-                    {'metric': 'Ø Download (Mbit/s)', 'gesamt': f"{stats_all['avg_download']:.2f}", 'auswahl': f"{auswahl['avg_download']:.2f}" if auswahl['avg_download'] is not None else '-'},
-                    {'metric': 'Min Download', 'gesamt': f"{stats_all['min_download']:.2f}", 'auswahl': f"{auswahl['min_download']:.2f}" if auswahl['min_download'] is not None else '-'},
-                    {'metric': 'Max Download', 'gesamt': f"{stats_all['max_download']:.2f}", 'auswahl': f"{auswahl['max_download']:.2f}" if auswahl['max_download'] is not None else '-'},
-                    {'metric': 'Ø Upload (Mbit/s)', 'gesamt': f"{stats_all['avg_upload']:.2f}", 'auswahl': f"{auswahl['avg_upload']:.2f}" if auswahl['avg_upload'] is not None else '-'},
-                    {'metric': 'Min Upload', 'gesamt': f"{stats_all['min_upload']:.2f}", 'auswahl': f"{auswahl['min_upload']:.2f}" if auswahl['min_upload'] is not None else '-'},
-                    {'metric': 'Max Upload', 'gesamt': f"{stats_all['max_upload']:.2f}", 'auswahl': f"{auswahl['max_upload']:.2f}" if auswahl['max_upload'] is not None else '-'},
-                    {'metric': 'Ø Ping (ms)', 'gesamt': f"{stats_all['avg_ping']:.2f}", 'auswahl': f"{auswahl['avg_ping']:.2f}" if auswahl['avg_ping'] is not None else '-'},
-                    {'metric': 'Min Ping', 'gesamt': f"{stats_all['min_ping']:.2f}", 'auswahl': f"{auswahl['min_ping']:.2f}" if auswahl['min_ping'] is not None else '-'},
-                    {'metric': 'Max Ping', 'gesamt': f"{stats_all['max_ping']:.2f}", 'auswahl': f"{auswahl['max_ping']:.2f}" if auswahl['max_ping'] is not None else '-'},
-                ]
-                stats_table.rows = new_stats_rows
-                stats_table.update()
+                # Gesamt-Spalte bleibt unverändert, nur die Auswahl wird neu formatiert
+                if set_selection_column(stats_rows, auswahl):
+                    stats_table.rows = stats_rows
                 
                 # Plot aktualisieren
-                update_line_plot_data(plot_measurements)
+                update_line_plot_data(plot_arrays)
+            
+            # Event Handler für Grid Selection: schnelle Folgen von Auswahländerungen (Shift-Klick,
+            # Mehrfachauswahl) werden gebündelt und lösen nur eine Aktualisierung aus
+            selection_task: Optional[asyncio.Task] = None
             
-            # Event Handler für Grid Selection
-            async def on_grid_selection_change():
-                selected_rows = await grid.get_selected_rows()
-                update_stats_and_plot(selected_rows if selected_rows else None)
+            async def apply_grid_selection():
+                await asyncio.sleep(SELECTION_DEBOUNCE_MS / 1000)
+                update_stats_and_plot(selected_indices)
+            
+            def on_grid_selection_change():
+                global selection_task
+                if selection_task is not None and not selection_task.done():
+                    selection_task.cancel()
+                selection_task = asyncio.create_task(apply_grid_selection())
             
             grid.on('selectionChanged', on_grid_selection_change)
     
@@ -1315,23 +1741,12 @@ with ui.row().classes('w-full gap-4 p-4'):
                     {'name': 'gesamt', 'label': 'Gesamt', 'field': 'gesamt', 'align': 'right'},
                     {'name': 'auswahl', 'label': 'Auswahl', 'field': 'auswahl', 'align': 'right'},
                 ],
-                rows=[
-                    {'metric': 'Anzahl Messungen', 'gesamt': stats_all['count'], 'auswahl': '-'},
-                    {'metric': 'Ø Download (Mbit/s)', 'gesamt': f"{stats_all['avg_download']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Min Download', 'gesamt': f"{stats_all['min_download']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Max Download', 'gesamt': f"{stats_all['max_download']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Ø Upload (Mbit/s)', 'gesamt': f"{stats_all['avg_upload']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Min Upload', 'gesamt': f"{stats_all['min_upload']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Max Upload', 'gesamt': f"{stats_all['max_upload']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Ø Ping (ms)', 'gesamt': f"{stats_all['avg_ping']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Min Ping', 'gesamt': f"{stats_all['min_ping']:.2f}", 'auswahl': '-'},
-                    {'metric': 'Max Ping', 'gesamt': f"{stats_all['max_ping']:.2f}", 'auswahl': '-'},
-                ],
+                rows=stats_rows,
                 row_key='metric'
             ).classes('w-full max-h-96')
         
         # Line Plot
-        with ui.card().classes('w-full'):
+        with ui.card().classes('w-full') as plot_card:
             ui.label('Zeitserie: Download, Upload & Ping').classes('text-lg font-bold')
             
             # Selectable Chips für Plot-Filter
@@ -1342,115 +1757,169 @@ with ui.row().classes('w-full gap-4 p-4'):
             
             # Matplotlib-basiertes Plot mit dual-axis
             plot_container = ui.matplotlib(figsize=tuple(config['plot']['figsize']))
-            async def download_plot_image():
-                # Figure als PNG in Bytes exportieren
+            # Schützt die Figure, während das PNG im Thread gerendert wird (Updates laufen im Event-Loop)
+            plot_lock = threading.RLock()
+            # Zuletzt exportiertes PNG als (Plot-Revision, PNG); jede Änderung am Plot erhöht die Revision
+            plot_revision = 0
+            plot_png: Optional[tuple] = None
+            
+            def _render_plot_png() -> bytes:
                 buf = io.BytesIO()
-                plot_container.figure.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-                buf.seek(0)
-                ui.download(buf.getvalue(), f'plot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
+                with plot_lock:
+                    plot_container.figure.savefig(buf, format='png', dpi=150, bbox_inches='tight')
+                return buf.getvalue()
+            
+            async def download_plot_image():
+                # Figure als PNG in Bytes exportieren (im Thread; unveränderter Plot aus dem Cache)
+                global plot_png
+                revision = plot_revision
+                if plot_png is not None and plot_png[0] == revision:
+                    png = plot_png[1]
+                else:
+                    png = await asyncio.to_thread(_render_plot_png)
+                    plot_png = (revision, png)
+                ui.download(png, f'plot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
             
             with ui.row().classes('gap-2 pb-2'):
                 ui.button('Schaubild herunterladen', on_click=download_plot_image, icon='image')
             
-            def update_line_plot_data(measurements: List[Dict] = None):
-                """Aktualisiert den Plot mit den übergebenen Messungen."""
-                global current_plot_measurements
-                if measurements is not None:
-                    current_plot_measurements = measurements
-                plot_data = current_plot_measurements
-                
-                if not plot_data:
+            # Achsen und Linien einmal anlegen; Updates setzen nur Daten, Sichtbarkeit und Ticks
+            ax1 = plot_container.figure.gca()
+            ax1.set_xlabel('Zeitpunkt', fontsize=10, fontweight='bold')
+            ax1.set_ylabel('Geschwindigkeit (Mbit/s)', fontsize=10, fontweight='bold', color='black')
+            ax1.tick_params(axis='y', labelcolor='black')
+            ax1.grid(True, alpha=0.3)
+            # Sekundäre Achse für Ping (ms), nur sichtbar wenn selektiert
+            ax2 = ax1.twinx()
+            ax2.set_ylabel('Ping (ms)', fontsize=10, fontweight='bold', color='green')
+            ax2.tick_params(axis='y', labelcolor='green')
+            # Obere Rahmenlinie wird nicht gebraucht (spart Zeichenarbeit je Update)
+            for ax in (ax1, ax2):
+                ax.spines['top'].set_visible(False)
+            plot_lines = {
+                'download': ax1.plot([], [], 'b-o', label='Download (Mbit/s)', linewidth=2, markersize=4)[0],
+                'upload': ax1.plot([], [], 'orange', marker='s', label='Upload (Mbit/s)', linewidth=2, markersize=4)[0],
+                'ping': ax2.plot([], [], 'g-^', label='Ping (ms)', linewidth=2, markersize=4)[0],
+            }
+            plot_chips = {'download': show_download, 'upload': show_upload, 'ping': show_ping}
+            plot_legend = None
+            # (Daten, sichtbare Linien) des zuletzt gesendeten Plots; unveränderte Aufrufe zeichnen nicht neu
+            plot_shown: Optional[tuple] = None
+            # Ping-Achse sichtbar beim letzten tight_layout(); None = neue Daten, Layout neu berechnen
+            plot_layout: Optional[bool] = None
+            # Gerenderte SVGs der aktuellen Daten je Chip-Kombination (wie plot_shown[1])
+            plot_svgs: Dict[tuple, str] = {}
+            # Plot-Karte war bereits sichtbar; vorher merken sich Updates nur die Daten
+            plot_visible = False
+            
+            def update_line_plot_data(plot_data: MeasurementArrays = None):
+                """Aktualisiert den Plot mit den übergebenen Messungen (Spalten in Zeitreihenfolge)."""
+                global current_plot_arrays, plot_shown, plot_layout
+                if plot_data is not None and not plot_data.same_values(current_plot_arrays):
+                    current_plot_arrays = plot_data
+                    plot_shown = plot_layout = None
+                    plot_svgs.clear()
+                if not plot_visible:
                     return
-                
-                # Sortiere nach Datetime
-                plot_data = sorted(plot_data, key=lambda m: m['datetime'])
-                
-                # Matplotlib Plot erstellen
-                plot_container.figure.clear()
-                
-                if len(plot_data) == 0:
+                if plot_shown is not None:
+                    # Gleicher Inhalt (z. B. doppelt ausgelöstes Ereignis): Liniendaten und Ticks behalten
+                    refresh_plot()
                     return
+                plot_data = current_plot_arrays
                 
-                # X-Achsen-Labels vorbereiten (nur jedes N-te Label anzeigen für Übersichtlichkeit)
-                x_indices = list(range(len(plot_data)))
-                x_labels = [m['datetime'].strftime('%d.%m\n%H:%M') for m in plot_data]
-                
-                # Daten sammeln
-                downloads = []
-                uploads = []
-                pings = []
-                
-                for measurement in plot_data:
-                    downloads.append(measurement['download'])
-                    uploads.append(measurement['upload'])
-                    pings.append(measurement['ping'])
-                
-                # Primäre Achse für Download & Upload (Mbit/s)
-                ax1 = plot_container.figure.gca()
-                ax1.set_xlabel('Zeitpunkt', fontsize=10, fontweight='bold')
-                ax1.set_ylabel('Geschwindigkeit (Mbit/s)', fontsize=10, fontweight='bold', color='black')
-                
-                # Plot Download & Upload
-                line1 = None
-                line2 = None
-                if show_download.selected:
-                    line1, = ax1.plot(x_indices, downloads, 'b-o', label='Download (Mbit/s)', linewidth=2, markersize=4)
-                if show_upload.selected:
-                    line2, = ax1.plot(x_indices, uploads, 'orange', marker='s', label='Upload (Mbit/s)', linewidth=2, markersize=4)
-                
-                ax1.tick_params(axis='y', labelcolor='black')
-                ax1.grid(True, alpha=0.3)
+                if not len(plot_data):
+                    return
                 
-                # Sekundäre Achse für Ping (ms) - nur wenn selektiert
-                if show_ping.selected:
-                    ax2 = ax1.twinx()
-                    ax2.set_ylabel('Ping (ms)', fontsize=10, fontweight='bold', color='green')
-                    line3, = ax2.plot(x_indices, pings, 'g-^', label='Ping (ms)', linewidth=2, markersize=4)
-                    ax2.tick_params(axis='y', labelcolor='green')
+                with plot_lock:
+                    # Linien aktualisieren; lange Reihen je Linie per LTTB auf PLOT_MAX_POINTS reduzieren
+                    for key, line in plot_lines.items():
+                        values = getattr(plot_data, key)
+                        picks = downsample_lttb(values, PLOT_MAX_POINTS)
+                        line.set_data(picks, values[picks])
                     
-                    # Kombinierte Legende
-                    lines = [line1, line2, line3] if line1 and line2 else ([line1, line3] if line1 else ([line2, line3] if line2 else [line3]))
-                    labels = []
-                    if line1:
-                        labels.append('Download (Mbit/s)')
-                    if line2:
-                        labels.append('Upload (Mbit/s)')
-                    if line3:
-                        labels.append('Ping (ms)')
-                    plot_container.figure.legend(lines, labels, loc='upper left', fontsize=9)
-                else:
-                    # Nur primäre Legende wenn Ping nicht aktiv
-                    lines = []
-                    labels = []
-                    if line1:
-                        lines.append(line1)
-                        labels.append('Download (Mbit/s)')
-                    if line2:
-                        lines.append(line2)
-                        labels.append('Upload (Mbit/s)')
-                    if lines:
-                        plot_container.figure.legend(lines, labels, loc='upper left', fontsize=9)
-                
-                # X-Achsen-Labels setzen (nur jedes 5. Label anzeigen wenn zu viele)
-                tick_interval = max(1, len(x_labels) // 10)
-                ax1.set_xticks([i for i in range(0, len(x_indices), tick_interval)])
-                ax1.set_xticklabels([x_labels[i] if i < len(x_labels) else '' for i in range(0, len(x_indices), tick_interval)], fontsize=8)
+                    # X-Achsen-Labels setzen (nur jedes 5. Label anzeigen wenn zu viele)
+                    tick_interval = max(1, len(plot_data) // 10)
+                    ticks = np.arange(0, len(plot_data), tick_interval)
+                    ax1.set_xticks(ticks)
+                    ax1.set_xticklabels([dt.strftime('%d.%m\n%H:%M') for dt in plot_data.datetimes[ticks].astype(datetime)], fontsize=8)
+                    
+                    refresh_plot()
+            
+            def refresh_plot():
+                """Zeigt die per Chip gewählten Linien, skaliert die Achsen und sendet den Plot (Daten bleiben)."""
+                global plot_legend, plot_revision, plot_shown, plot_layout
+                if not len(current_plot_arrays):
+                    return
+                shown = (id(current_plot_arrays), tuple(chip.selected for chip in plot_chips.values()))
+                if shown == plot_shown:
+                    return
                 
-                plot_container.figure.tight_layout()
-                plot_container.update()
+                with plot_lock:
+                    plot_shown = shown
+                    plot_revision += 1
+                    for key, line in plot_lines.items():
+                        line.set_visible(plot_chips[key].selected)
+                    ax2.set_visible(show_ping.selected)
+                    for ax in (ax1, ax2):
+                        ax.relim(visible_only=True)
+                        ax.autoscale_view()
+                    
+                    # Gemeinsame Legende der sichtbaren Linien
+                    if plot_legend is not None:
+                        plot_legend.remove()
+                        plot_legend = None
+                    visible = [line for line in plot_lines.values() if line.get_visible()]
+                    if visible:
+                        plot_legend = plot_container.figure.legend(visible, [line.get_label() for line in visible], loc='upper left', fontsize=9)
+                    
+                    # Ränder hängen an Tick-Beschriftungen und Ping-Achse; Chip-Wechsel von
+                    # Download/Upload behalten das Layout
+                    if plot_layout != show_ping.selected:
+                        plot_container.figure.tight_layout()
+                        plot_layout = show_ping.selected
+                    
+                    svg = plot_svgs.get(shown[1])
+                    if svg is not None:
+                        # Kombination schon gerendert (z. B. Chip aus und wieder an): SVG ohne
+                        # erneutes savefig senden; die Figure selbst ist oben bereits angepasst
+                        with plot_container.props.suspend_updates():
+                            plot_container.props['innerHTML'] = svg
+                        ui.element.update(plot_container)
+                    else:
+                        plot_container.update()
+                        if len(plot_svgs) >= PLOT_SVG_CACHE_SIZE:
+                            plot_svgs.clear()
+                        plot_svgs[shown[1]] = plot_container.props['innerHTML']
             
-            # Initial rendern mit aktuellem Zeitraum-Filter
+            # Daten des aktuellen Zeitraum-Filters vormerken; gerendert wird erst, wenn die Karte
+            # (unterhalb von Grid und Statistik) in den sichtbaren Bereich kommt
             _sel = timeframe_select.value
             _initial_plot_data = (
                 all_measurements if _sel == 'all'
                 else filter_measurements_by_timeframe(all_measurements, int(_sel))
             )
-            update_line_plot_data(_initial_plot_data)
+            update_line_plot_data(timeframe_arrays(all_arrays, _initial_plot_data))
+            
+            def _on_plot_visible():
+                global plot_visible
+                if not plot_visible:
+                    plot_visible = True
+                    update_line_plot_data()
+            
+            ui.on('plot_visible', _on_plot_visible)
+            # Ohne IntersectionObserver sofort rendern; rootMargin rendert kurz vor dem Einblenden
+            ui.timer(0, lambda: ui.run_javascript(
+                '(() => { const card = getHtmlElement(' + json.dumps(plot_card.id) + ');'
+                ' if (!card || !("IntersectionObserver" in window)) { emitEvent("plot_visible"); return; }'
+                ' const observer = new IntersectionObserver(entries => {'
+                ' if (entries.some(entry => entry.isIntersecting)) { observer.disconnect(); emitEvent("plot_visible"); } },'
+                ' {rootMargin: "200px"}); observer.observe(card); })()'
+            ), once=True)
             
-            # Update wenn Chips selektiert werden
-            show_download.on_selection_change(lambda: update_line_plot_data(None))
-            show_upload.on_selection_change(lambda: update_line_plot_data(None))
-            show_ping.on_selection_change(lambda: update_line_plot_data(None))
+            # Chips ändern nur die Sichtbarkeit, die Liniendaten bleiben
+            show_download.on_selection_change(lambda: refresh_plot())
+            show_upload.on_selection_change(lambda: refresh_plot())
+            show_ping.on_selection_change(lambda: refresh_plot())
 
 # ============================================================================
 # EVENT HANDLER
@@ -1465,41 +1934,18 @@ def on_timeframe_change():
         days = int(selected_value)
         filtered = filter_measurements_by_timeframe(all_measurements, days)
     
-    # AGGrid aktualisieren
-    new_grid_data = [
-        {
-            'datetime': m['datetime'].isoformat(),
-            'download': m['download'],
-            'upload': m['upload'],
-            'ping': m['ping'],
-            'os': m['os'],
-            'browser': m['browser'],
-        }
-        for m in filtered
-    ]
-    grid.options['rowData'] = new_grid_data
-    grid.update()
+    # AGGrid aktualisieren (geladene Zeilenblöcke werden neu vom Server angefordert)
+    show_in_grid(filtered)
     
     # Statistiken aktualisieren
-    global stats_all
-    stats = calculate_statistics(filtered)
-    new_stats_rows = [
-        {'metric': 'Anzahl Messungen', 'gesamt': stats_all['count'], 'auswahl': stats['count']},
-        {'metric': 'Ø Download (Mbit/s)', 'gesamt': f"{stats_all['avg_download']:.2f}", 'auswahl': f"{stats['avg_download']:.2f}"},
-        {'metric': 'Min Download', 'gesamt': f"{stats_all['min_download']:.2f}", 'auswahl': f"{stats['min_download']:.2f}"},
-        {'metric': 'Max Download', 'gesamt': f"{stats_all['max_download']:.2f}", 'auswahl': f"{stats['max_download']:.2f}"},
-        {'metric': 'Ø Upload (Mbit/s)', 'gesamt': f"{stats_all['avg_upload']:.2f}", 'auswahl': f"{stats['avg_upload']:.2f}"},
-        {'metric': 'Min Upload', 'gesamt': f"{stats_all['min_upload']:.2f}", 'auswahl': f"{stats['min_upload']:.2f}"},
-        {'metric': 'Max Upload', 'gesamt': f"{stats_all['max_upload']:.2f}", 'auswahl': f"{stats['max_upload']:.2f}"},
-        {'metric': 'Ø Ping (ms)', 'gesamt': f"{stats_all['avg_ping']:.2f}", 'auswahl': f"{stats['avg_ping']:.2f}"},
-        {'metric': 'Min Ping', 'gesamt': f"{stats_all['min_ping']:.2f}", 'auswahl': f"{stats['min_ping']:.2f}"},
-        {'metric': 'Max Ping', 'gesamt': f"{stats_all['max_ping']:.2f}", 'auswahl': f"{stats['max_ping']:.2f}"},
-    ]
-    stats_table.rows = new_stats_rows
-    stats_table.update()
+    stats = timeframe_statistics(len(all_measurements) - len(filtered))
+    if set_selection_column(stats_rows, stats):
+        # Zuweisung markiert die Tabelle zum Senden; NiceGUI überträgt alle Änderungen dieses
+        # Handlers (Tabelle, Plot, Grid-Aufruf) gemeinsam, ein zusätzliches update() entfällt
+        stats_table.rows = stats_rows
     
     # Plot aktualisieren und globalen Zustand setzen
-    update_line_plot_data(filtered)
+    update_line_plot_data(timeframe_arrays(all_arrays, filtered))
 
 timeframe_select.on('update:model-value', on_timeframe_change)
 
@@ -0,0 +1,227 @@
+"""Einlesen der Messprotokolle samt Caches.
+
+Eigenes Modul, da main.py im Script-Modus von NiceGUI je Seitenaufruf neu ausgeführt wird; die
+Caches hier liegen in sys.modules und werden von allen Seitenaufrufen geteilt. Schlüssel sind
+Verzeichnis und Fingerabdruck, die Ergebnisse werden geteilt und dürfen nicht verändert werden.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import functools
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# DATENLADEN UND PARSING
+# ============================================================================
+# Spalten der Messprotokolle -> Schlüssel im Messungs-Dict
+CSV_COLUMNS = {
+    'Messzeitpunkt': 'date',
+    'Uhrzeit': 'time',
+    'Download (Mbit/s)': 'download',
+    'Upload (Mbit/s)': 'upload',
+    'Laufzeit (ms)': 'ping',
+    'Test-ID': 'test_id',
+    'Version': 'version',
+    'Betriebssystem': 'os',
+    'Internet-Browser': 'browser',
+}
+CSV_NUMERIC_COLUMNS = ['download', 'upload', 'ping']
+CSV_TEXT_COLUMNS = ['date', 'time', 'test_id', 'version', 'os', 'browser']
+CSV_READ_WORKERS = 8
+MEASUREMENT_KEYS = ['datetime', 'date', 'time', 'download', 'upload', 'ping', 'test_id', 'version', 'os', 'browser']
+
+def _read_measurement_csv(csv_file: Path) -> pd.DataFrame:
+    """Liest eine Messprotokoll-CSV mit dem C-Parser von pandas (nur Tokenisierung)."""
+    df = pd.read_csv(
+        csv_file,
+        sep=';',
+        decimal=',',
+        quotechar='"',
+        engine='c',
+        encoding='utf-8',
+        usecols=lambda c: c in CSV_COLUMNS,
+        dtype={c: 'string' for c, key in CSV_COLUMNS.items() if key in CSV_TEXT_COLUMNS},
+        keep_default_na=False,
+    ).rename(columns=CSV_COLUMNS)
+    
+    # Fehlende Spalten wie bisher mit Standardwerten auffüllen
+    for key in CSV_NUMERIC_COLUMNS:
+        if key not in df:
+            df[key] = 0.0
+    for key in CSV_TEXT_COLUMNS:
+        if key not in df:
+            df[key] = ''
+    return df
+
+def _try_read_measurement_csv(csv_file: Path) -> Optional[pd.DataFrame]:
+    """Wie _read_measurement_csv, meldet Lesefehler aber und liefert dann None."""
+    try:
+        return _read_measurement_csv(csv_file)
+    except Exception as e:
+        print(f"Fehler beim Lesen von {csv_file}: {e}")
+        return None
+
+def _normalize_measurements(df: pd.DataFrame) -> pd.DataFrame:
+    """Konvertiert Zahlen und Zeitstempel aller Dateien in einem Durchlauf und verwirft ungültige Zeilen."""
+    # Zahlen: Dezimalkomma löst bereits der Parser (decimal=','); nur Spalten mit ungültigen
+    # Werten bleiben Text und werden hier zeilenweise erzwungen
+    for key in CSV_NUMERIC_COLUMNS:
+        if pd.api.types.is_numeric_dtype(df[key]):
+            df[key] = df[key].astype('float64')
+        else:
+            df[key] = pd.to_numeric(
+                df[key].astype('string').str.replace(',', '.', regex=False), errors='coerce'
+            ).astype('float64')
+    # Anführungszeichen entfernt der Parser selbst (quotechar='"')
+    for key in CSV_TEXT_COLUMNS:
+        df[key] = df[key].astype('string')
+    
+    # Datum und Zeit zusammenführen (deutsches Datumsformat)
+    df['datetime'] = pd.to_datetime(
+        df['date'] + ' ' + df['time'],
+        format='%d.%m.%Y %H:%M:%S',
+        errors='coerce',
+        cache=True,
+    )
+    
+    invalid = df['datetime'].isna() | df[CSV_NUMERIC_COLUMNS].isna().any(axis=1)
+    if invalid.any():
+        for csv_file, count in df.index.get_level_values(0)[invalid.to_numpy()].value_counts(sort=False).items():
+            print(f"Fehler beim Parsen von {count} Zeile(n) in {csv_file}")
+        df = df[~invalid]
+    return df[MEASUREMENT_KEYS]
+
+# Exportdatum im Dateinamen: Breitbandmessung_DD_MM_YYYY_HH_MM_SS.csv
+MEASUREMENT_FILE_DATE = re.compile(r'Breitbandmessung_(\d{2})_(\d{2})_(\d{4})')
+
+def _file_predates(name: str, since: datetime) -> bool:
+    """True, wenn die Datei laut Dateiname vor dem Stichtag exportiert wurde (keine Messung ab `since` enthält)."""
+    match = MEASUREMENT_FILE_DATE.match(name)
+    if not match:
+        return False
+    day, month, year = (int(part) for part in match.groups())
+    try:
+        return (year, month, day) < (since.year, since.month, since.day)
+    except ValueError:
+        return False
+
+def measurements_fingerprint(path: Path, since: Optional[datetime] = None) -> tuple:
+    """Günstiger Fingerabdruck des Messprotokoll-Verzeichnisses (Name, mtime, Größe je Datei).
+    
+    Mit `since` werden Dateien, deren Exportdatum vor dem Stichtag liegt, gar nicht erst aufgenommen.
+    """
+    fingerprint = []
+    for csv_file in path.glob('Breitbandmessung_*.csv'):
+        if since is not None and _file_predates(csv_file.name, since):
+            continue
+        try:
+            stat = csv_file.stat()
+        except OSError:
+            continue
+        fingerprint.append((csv_file.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(fingerprint))
+
+@functools.lru_cache(maxsize=4)
+def measurements_frame(path: Path, fingerprint: tuple) -> pd.DataFrame:
+    """Parst die im Fingerabdruck enthaltenen Dateien zu einem nach Zeit sortierten DataFrame (gecacht)."""
+    csv_files = [path / name for name, _mtime, _size in fingerprint]
+    
+    # Dateien parallel einlesen: der C-Parser von pandas gibt während der Tokenisierung die GIL frei
+    frames = {}
+    if csv_files:
+        with ThreadPoolExecutor(max_workers=min(CSV_READ_WORKERS, len(csv_files))) as executor:
+            for csv_file, df in zip(csv_files, executor.map(_try_read_measurement_csv, csv_files)):
+                if df is not None and not df.empty:
+                    frames[csv_file] = df
+    
+    if not frames:
+        return pd.DataFrame(columns=MEASUREMENT_KEYS)
+    
+    # Alle Dateien zusammenführen, dann Parsing und Sortierung einmalig für den Gesamtbestand
+    df = _normalize_measurements(pd.concat(frames)).sort_values('datetime', kind='mergesort')
+    return df.reset_index(drop=True)
+
+@functools.lru_cache(maxsize=4)
+def measurements_as_records(path: Path, fingerprint: tuple) -> List[Dict[str, Any]]:
+    """Wandelt den gecachten DataFrame einmalig pro Fingerabdruck in eine Liste von Dicts um."""
+    df = measurements_frame(path, fingerprint)
+    if df.empty:
+        return []
+    df = df.copy()
+    # Erst an der API-Grenze in Dicts umwandeln; datetime als natives Python-Objekt
+    df['datetime'] = pd.Series(
+        df['datetime'].to_numpy(dtype='datetime64[us]').astype(object), index=df.index, dtype=object
+    )
+    for key in CSV_TEXT_COLUMNS:
+        df[key] = df[key].astype(object)
+    # Position im sortierten Gesamtbestand (Index passender MeasurementArrays)
+    df['idx'] = df.index
+    return df.to_dict('records')
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+def datetimes_to_datetime64(values, count: int) -> np.ndarray:
+    """Wandelt naive datetimes in datetime64[us] um (über ganzzahlige Mikrosekunden seit 1970).
+    
+    Deutlich schneller als NumPys Konvertierung einzelner datetime-Objekte.
+    """
+    return np.fromiter(((dt - _EPOCH) // _ONE_MICROSECOND for dt in values), dtype=np.int64, count=count).view('datetime64[us]')
+
+@dataclass(frozen=True)
+class MeasurementArrays:
+    """Messungen als parallele NumPy-Arrays (Structure of Arrays), in der Reihenfolge der Quelle."""
+    datetimes: np.ndarray  # datetime64[us]
+    download: np.ndarray   # float64
+    upload: np.ndarray     # float64
+    ping: np.ndarray       # float64
+    
+    def __len__(self) -> int:
+        return len(self.datetimes)
+    
+    def __getitem__(self, index) -> 'MeasurementArrays':
+        """Teilmenge per Slice (ohne Kopie) oder Indexarray."""
+        return MeasurementArrays(self.datetimes[index], self.download[index], self.upload[index], self.ping[index])
+    
+    def same_values(self, other: 'MeasurementArrays') -> bool:
+        """True, wenn beide dieselben Messungen in derselben Reihenfolge enthalten."""
+        if self is other:
+            return True
+        if len(self) != len(other):
+            return False
+        return all(
+            np.array_equal(getattr(self, name), getattr(other, name), equal_nan=True)
+            for name in ('datetimes', 'download', 'upload', 'ping')
+        )
+    
+    @classmethod
+    def from_records(cls, measurements: List[Dict]) -> 'MeasurementArrays':
+        """Spaltenweise Kopie einer Messungsliste (Dicts mit datetime, download, upload, ping)."""
+        count = len(measurements)
+        return cls(
+            datetimes=datetimes_to_datetime64(map(itemgetter('datetime'), measurements), count),
+            download=np.fromiter(map(itemgetter('download'), measurements), dtype=np.float64, count=count),
+            upload=np.fromiter(map(itemgetter('upload'), measurements), dtype=np.float64, count=count),
+            ping=np.fromiter(map(itemgetter('ping'), measurements), dtype=np.float64, count=count),
+        )
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MeasurementArrays':
+        """Spalten direkt aus einem Messungs-DataFrame (ohne Umweg über Dicts)."""
+        return cls(
+            datetimes=df['datetime'].to_numpy(dtype='datetime64[us]'),
+            download=df['download'].to_numpy(dtype=np.float64),
+            upload=df['upload'].to_numpy(dtype=np.float64),
+            ping=df['ping'].to_numpy(dtype=np.float64),
+        )
+
+@functools.lru_cache(maxsize=4)
+def measurements_as_arrays(path: Path, fingerprint: tuple) -> MeasurementArrays:
+    """Spaltenweise Sicht auf den gecachten DataFrame, einmalig pro Fingerabdruck."""
+    return MeasurementArrays.from_frame(measurements_frame(path, fingerprint))
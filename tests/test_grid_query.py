@@ -0,0 +1,41 @@
+"""Tests für das serverseitige Filtern und Sortieren der Grid-Zeilen."""
+from datetime import datetime, timedelta
+
+from grid_query import query_grid_rows
+
+
+def _rows():
+    """Vier Zeilen in Zeitordnung; 'idx' ist die Position im Gesamtbestand."""
+    start = datetime(2025, 1, 1, 12, 0)
+    downloads = [100.0, 300.0, 200.0, 200.0]
+    return [
+        {'idx': i, 'datetime': start + timedelta(hours=i), 'download': download}
+        for i, download in enumerate(downloads)
+    ]
+
+
+def _order(rows):
+    return [row['idx'] for row in rows]
+
+
+def test_sort_by_datetime_descending():
+    rows = query_grid_rows(_rows(), [{'colId': 'datetime', 'sort': 'desc'}], {})
+    assert _order(rows) == [3, 2, 1, 0]
+
+
+def test_sort_by_datetime_then_download():
+    sort_model = [{'colId': 'datetime', 'sort': 'desc'}, {'colId': 'download', 'sort': 'asc'}]
+    rows = query_grid_rows(_rows(), sort_model, {})
+    assert _order(rows) == [3, 2, 1, 0]
+
+
+def test_sort_by_download_then_datetime():
+    sort_model = [{'colId': 'download', 'sort': 'asc'}, {'colId': 'datetime', 'sort': 'desc'}]
+    rows = query_grid_rows(_rows(), sort_model, {})
+    assert _order(rows) == [0, 3, 2, 1]
+
+
+def test_number_filter():
+    filter_model = {'download': {'filterType': 'number', 'type': 'greaterThan', 'filter': 150}}
+    rows = query_grid_rows(_rows(), [], filter_model)
+    assert _order(rows) == [1, 2, 3]